@@ -1,24 +1,60 @@
 """app/main.py
-Ensure environment variables from the repo root `.env` are loaded early so the
-backend can use the central .env placed at the repository root.
+FastAPI application entry point.
+
+Importing this module only builds the app; the simulator is started (and
+stopped) by the lifespan hook, and the Supabase client is created on first
+use. Environment variables from the repo root `.env` are loaded by
+`app.sim_config`.
 """
-from dotenv import load_dotenv
-import pathlib
-import os
+import time
+
+_import_started = time.perf_counter()
 
-repo_root = pathlib.Path(__file__).resolve().parents[2]
-env_path = repo_root / '.env'
-if env_path.exists():
-    load_dotenv(env_path)
+import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
+from app.routers.alerts import router as alerts_router
 from app.routers.market import router as market_router
 from app.routers.portfolio import router as portfolio_router
-from app.utils.simulator import start_simulation
+from app.sim_config import config
+from app.utils.simulator import start_simulation, stop_simulation
+from app.utils.replay import start_recording, start_replay, stop_recording
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(default_response_class=ORJSONResponse)
+logger = logging.getLogger(config.LOGGER)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    if config.SIM_REPLAY_PATH:
+        start_replay(
+            config.SIM_REPLAY_PATH,
+            speed=config.SIM_REPLAY_SPEED,
+            start_step=config.SIM_REPLAY_START,
+            loop=config.SIM_REPLAY_LOOP,
+        )
+    else:
+        start_simulation()
+    if config.SIM_RECORD_PATH:
+        start_recording(config.SIM_RECORD_PATH)
+    ready = time.perf_counter()
+    logger.info(
+        "startup: imports %.1f ms, simulator %.1f ms",
+        (_imported - _import_started) * 1000,
+        (ready - started) * 1000,
+    )
+
+    yield
+
+    stop_simulation()
+    stop_recording()
+    logger.info("shutdown: simulator stopped")
+
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 
 app.add_middleware(
@@ -31,5 +67,6 @@ app.add_middleware(
 
 app.include_router(market_router, prefix="/crypto")
 app.include_router(portfolio_router, prefix="/crypto")
+app.include_router(alerts_router, prefix="/crypto")
 
-start_simulation()
+_imported = time.perf_counter()
@@ -0,0 +1,30 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+_REQUIRED = {
+    "above": ("price",),
+    "below": ("price",),
+    "range": ("low", "high"),
+    "percent": ("percent",),
+}
+
+class AlertCreate(BaseModel):
+    """`above`/`below` fire when the price crosses `price`; `range` when it
+    leaves [low, high]; `percent` when it moves `percent`% either way from
+    the symbol's initial price."""
+    symbol: str
+    kind: Literal["above", "below", "range", "percent"]
+    price: Optional[float] = Field(None, gt=0)
+    low: Optional[float] = Field(None, gt=0)
+    high: Optional[float] = Field(None, gt=0)
+    percent: Optional[float] = Field(None, gt=0, lt=100)
+
+    @model_validator(mode="after")
+    def _check_kind(self):
+        missing = [f for f in _REQUIRED[self.kind] if getattr(self, f) is None]
+        if missing:
+            raise ValueError(f"'{self.kind}' alerts need {', '.join(missing)}")
+        if self.kind == "range" and self.low >= self.high:
+            raise ValueError("low must be below high")
+        return self
@@ -1,6 +1,10 @@
 from pydantic import BaseModel
 from typing import Optional
 
+import app.sim_config as cfg
+from app.utils.history import PriceHistory
+from app.utils.orderbook import LimitOrderBook
+
 class Crypto(BaseModel):
     symbol: str
     price: float
@@ -17,3 +21,34 @@ class CryptoCreate(BaseModel):
 class CryptoPortfolioAdd(BaseModel):
     user_id: Optional[str] = None
     name: str
+
+
+class CryptoRecord:
+    """
+    Internal market state for one symbol, mutated by the simulator every tick.
+    `Crypto` is only built from it at the API boundary.
+    """
+    __slots__ = ("symbol", "slot", "price", "volume", "history", "initial_price", "book")
+
+    def __init__(self, symbol, price, volume=0.0, initial_price=0.0, history=(), slot=None):
+        self.symbol = symbol
+        self.slot = slot
+        self.price = float(price)
+        self.volume = float(volume)
+        self.initial_price = float(initial_price)
+        self.history = PriceHistory(history)
+        self.book = LimitOrderBook()
+
+    def to_dict(self):
+        return {
+            "symbol": self.symbol,
+            "price": self.price,
+            "volume": self.volume,
+            "history": self.history.tolist(),
+            "initial_price": self.initial_price,
+            "order_book": self.book.snapshot(cfg.ORDER_BOOK_DEPTH),
+        }
+
+    def to_api(self) -> Crypto:
+        # values are already typed, so skip validation
+        return Crypto.model_construct(**self.to_dict())
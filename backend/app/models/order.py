@@ -0,0 +1,8 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+class OrderCreate(BaseModel):
+    side: Literal["buy", "sell"]
+    price: float = Field(gt=0)
+    quantity: float = Field(gt=0)
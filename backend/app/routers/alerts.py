@@ -0,0 +1,38 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from app.models.alert import AlertCreate
+from app.services.alerts import alerts_add, alerts_cancel, alerts_list, alerts_poll
+from app.utils.auth import get_current_user_id
+
+router = APIRouter(prefix="/alerts", tags=["Alerts"])
+
+
+@router.post("")
+def alert_add(data: AlertCreate, request: Request):
+    user_id = get_current_user_id(request)
+    try:
+        alert = alerts_add(user_id, data)
+    except ValueError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    if not alert:
+        raise HTTPException(status_code=404, detail="Crypto not found")
+    return alert
+
+
+@router.get("")
+def alert_list(request: Request):
+    return alerts_list(get_current_user_id(request))
+
+
+@router.get("/fired")
+def alert_poll(request: Request, limit: int = Query(100, ge=1, le=1000)):
+    """Fired alerts since the last poll, oldest first"""
+    return alerts_poll(get_current_user_id(request), limit)
+
+
+@router.delete("/{alert_id}")
+def alert_cancel(alert_id: int, request: Request):
+    user_id = get_current_user_id(request)
+    alert = alerts_cancel(user_id, alert_id)
+    if not alert:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    return alert
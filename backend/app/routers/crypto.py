@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, Response
 from app.models.crypto import Crypto, CryptoCreate, CryptoPortfolioAdd
 from app.services.crypto import (
     add_crypto, 
@@ -9,6 +9,7 @@ from app.services.crypto import (
     get_cryptos_from_portfolio_service,
     add_crypto_to_portfolio_service
 )
+from app.services.portfolio import portfolio_hydrate_rows
 from app.utils.auth import get_current_user_id
 
 router = APIRouter(tags=["Crypto"])
@@ -83,57 +84,7 @@ def delete_crypto_from_portfolio(data: CryptoPortfolioAdd, request: Request):
 @router.get("/portfolio")
 def get_cryptos_from_portfolio(user_id: str):
     rows = get_cryptos_from_portfolio_service(user_id) or []
-
-    # Map DB rows to frontend-expected Crypto-like objects.
-    # If a crypto isn't in memory, try to seed it from DB fields so we can return a live price.
-    result = []
-    for r in rows:
-        # Supabase row should include a 'name' field for the crypto symbol
-        name = (r.get('name') or r.get('symbol') or '').upper()
-        if not name:
-            continue
-
-        live = get_crypto(name)
-        if not live:
-            # Attempt to seed the in-memory store from DB row values
-            try:
-                init_price = float(r.get('initial_price') or r.get('price') or 0.0)
-            except (TypeError, ValueError):
-                init_price = 0.0
-
-            try:
-                vol = float(r.get('volume') or 0.0)
-            except (TypeError, ValueError):
-                vol = 0.0
-
-            if init_price > 0.0:
-                # create and register the crypto in-memory so the simulator can provide live prices
-                seed = Crypto(
-                    symbol=name,
-                    price=init_price,
-                    volume=vol,
-                    initial_price=init_price,
-                    history=[],
-                    order_book={},
-                )
-                # add_crypto returns the stored object or None if already exists
-                added = add_crypto(seed)
-                live = added or get_crypto(name)
-
-        if live:
-            result.append(live.dict())
-        else:
-            # Fallback: construct a minimal object from DB row
-            result.append({
-                'symbol': name,
-                'price': float(r.get('initial_price') or r.get('price') or 0.0),
-                'volume': float(r.get('volume') or 0.0),
-                'history': [],
-                'initial_price': float(r.get('initial_price') or r.get('price') or 0.0),
-                'order_book': {},
-            })
-
-    return result
+    return Response(content=portfolio_hydrate_rows(rows), media_type="application/json")
 
 @router.get("/list")
 def api_list():
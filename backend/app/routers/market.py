@@ -1,12 +1,26 @@
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from app.models.crypto import Crypto, CryptoCreate
+from app.models.order import OrderCreate
 from app.services.market import (
     market_add_crypto,
     market_list_cryptos,
     market_get_crypto,
+    market_get_history,
+    market_get_book,
+    market_get_order,
+    market_place_order,
+    market_cancel_order,
     market_update_price,
     market_delete_crypto,
+    market_export_stream,
 )
+from app.utils.export import EXPORT_FORMATS, MEDIA_TYPES, arrow_available, encode_columns
+from app.utils.granularity import get_history_for_granularity
+from app.utils.auth import get_current_user_id
+from app.utils.simulator import simulation_status
 
 router = APIRouter(prefix="/market", tags=["Market"])
 
@@ -35,6 +49,36 @@ def market_list():
     return market_list_cryptos()
 
 
+@router.get("/status")
+def market_status():
+    """Simulator tick telemetry"""
+    return simulation_status()
+
+
+def _check_binary_format(format: str):
+    if format == "arrow" and not arrow_available():
+        raise HTTPException(status_code=501, detail="Arrow export requires pyarrow")
+
+
+@router.get("/export")
+def market_export(
+    symbols: Optional[str] = Query(None, description="Comma-separated symbols, all when omitted"),
+    format: str = Query("npy", description=f"One of {EXPORT_FORMATS}"),
+):
+    """Stream state and price history of the market as `.npy` or Arrow IPC"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {EXPORT_FORMATS}")
+    _check_binary_format(format)
+
+    wanted = [s.strip().upper() for s in (symbols or '').split(',') if s.strip()]
+    ext = "arrows" if format == "arrow" else "npy"
+    return StreamingResponse(
+        market_export_stream(wanted, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="market.{ext}"'},
+    )
+
+
 @router.get("/{symbol}")
 def market_get(symbol: str):
     crypto = market_get_crypto(symbol)
@@ -43,6 +87,59 @@ def market_get(symbol: str):
     return crypto
 
 
+@router.get("/{symbol}/candles")
+def market_candles(symbol: str, granularity: str = "1m", format: str = "json"):
+    history = market_get_history(symbol)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Crypto not found")
+
+    try:
+        candles = get_history_for_granularity(history, granularity, format=format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "json":
+        return candles
+
+    _check_binary_format(format)
+    return Response(content=encode_columns(candles, format), media_type=MEDIA_TYPES[format])
+
+
+@router.get("/{symbol}/book")
+def market_book(symbol: str, depth: int = Query(10, ge=1, le=500)):
+    book = market_get_book(symbol, depth)
+    if not book:
+        raise HTTPException(status_code=404, detail="Crypto not found")
+    return book
+
+
+@router.post("/{symbol}/orders")
+def market_order_place(symbol: str, data: OrderCreate, request: Request):
+    user_id = get_current_user_id(request)
+    order = market_place_order(symbol, user_id, data.side, data.price, data.quantity)
+    if not order:
+        raise HTTPException(status_code=404, detail="Crypto not found")
+    return order
+
+
+@router.get("/{symbol}/orders/{order_id}")
+def market_order_get(symbol: str, order_id: int, request: Request):
+    user_id = get_current_user_id(request)
+    order = market_get_order(symbol, user_id, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
+
+
+@router.delete("/{symbol}/orders/{order_id}")
+def market_order_cancel(symbol: str, order_id: int, request: Request):
+    user_id = get_current_user_id(request)
+    order = market_cancel_order(symbol, user_id, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
+
+
 @router.put("/{symbol}/price")
 def market_update(symbol: str, price: float):
     crypto = market_update_price(symbol, price)
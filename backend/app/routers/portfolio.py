@@ -1,10 +1,10 @@
-from fastapi import APIRouter, HTTPException, Request, Query
+from fastapi import APIRouter, HTTPException, Request, Query, Response
 from app.models.crypto import CryptoCreate, CryptoPortfolioAdd, Crypto
 from app.services.portfolio import (
     portfolio_add_crypto,
     portfolio_delete_crypto,
     portfolio_get_user_cryptos,
-    portfolio_seed_crypto_from_row,
+    portfolio_hydrate_rows,
 )
 from app.services.market import (
     market_add_crypto,
@@ -71,33 +71,10 @@ def portfolio_delete(user_id: str, data: CryptoPortfolioAdd, request: Request):
         raise HTTPException(status_code=400, detail="Crypto does not exist in portfolio")
 
     return result
+
+
 @router.get("")
 def portfolio_list(user_id: str = Query(..., description="User ID")):
     """Get all cryptos in user's portfolio"""
     rows = portfolio_get_user_cryptos(user_id) or []
-
-    result = []
-    for r in rows:
-        name = (r.get('name') or r.get('symbol') or '').upper()
-        if not name:
-            continue
-
-        live = market_get_crypto(name)
-        if not live:
-            # attempt seeding using portfolio service helper
-            seeded = portfolio_seed_crypto_from_row(r)
-            live = seeded or market_get_crypto(name)
-
-        if live:
-            result.append(live.dict())
-        else:
-            result.append({
-                'symbol': name,
-                'price': float(r.get('initial_price') or r.get('price') or 0.0),
-                'volume': float(r.get('volume') or 0.0),
-                'history': [],
-                'initial_price': float(r.get('initial_price') or r.get('price') or 0.0),
-                'order_book': {},
-            })
-
-    return result
+    return Response(content=portfolio_hydrate_rows(rows), media_type="application/json")
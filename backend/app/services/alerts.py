@@ -0,0 +1,45 @@
+"""
+Alert services: register, list, cancel and poll a user's price alerts.
+"""
+from app.models.alert import AlertCreate
+from app.utils.alerts import ABOVE, BELOW, PERCENT, alert_engine
+from app.utils.db import cryptos, lock
+from app.utils.simulator import touch
+
+
+def alerts_add(owner: str, data: AlertCreate):
+    """Register an alert; returns it (already fired if its condition holds
+    now), or None for an unknown symbol. Raises ValueError past the per-user limit."""
+    with lock:
+        r = cryptos.get(data.symbol.upper())
+        if r is None:
+            return None
+        touch(r)
+        # only the bounds of the kind are kept, whatever else was sent
+        if data.kind == ABOVE:
+            low, high = None, data.price
+        elif data.kind == BELOW:
+            low, high = data.price, None
+        elif data.kind == PERCENT:
+            low = r.initial_price * (1.0 - data.percent / 100.0)
+            high = r.initial_price * (1.0 + data.percent / 100.0)
+        else:
+            low, high = data.low, data.high
+        alert = alert_engine.add(r, owner, data.kind, low=low, high=high, percent=data.percent)
+        return alert.to_dict()
+
+
+def alerts_list(owner: str):
+    with lock:
+        return alert_engine.list(owner)
+
+
+def alerts_cancel(owner: str, alert_id: int):
+    with lock:
+        alert = alert_engine.cancel(owner, alert_id)
+        return alert.to_dict() if alert else None
+
+
+def alerts_poll(owner: str, limit: int):
+    with lock:
+        return alert_engine.poll(owner, limit)
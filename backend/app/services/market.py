@@ -1,42 +1,221 @@
 """
 Market-related services: manage in-memory cryptos (simulator-backed)
+
+The store holds `CryptoRecord`s; every function here that hands market data
+back to a router converts it to the `Crypto` API model.
 """
-from app.utils.db import cryptos
-from app.models.crypto import Crypto
-from app.utils.simulator import create_order_book
+import numpy as np
 
+import app.sim_config as cfg
+from app.utils.db import cryptos, lock
+from app.models.crypto import Crypto, CryptoRecord
+from app.utils.registry import registry
+from app.utils.alerts import alert_engine
+from app.utils.export import EXPORT_CHUNK, stream_market
+from app.utils.simulator import catch_up, init_book, release_state, round_to_tick, touch, _microprice
 
-def market_add_crypto(data: Crypto):
+_EMPTY = np.empty(0, dtype=np.float64)
+_CATCHUP_CHUNK = 64
+
+
+def _register(data: Crypto):
     symbol = data.symbol.upper()
 
     if symbol in cryptos:
         return None
 
-    data.symbol = symbol
-    data.initial_price = data.price
-    data.order_book = create_order_book(data.price)
-    data.history = [data.price]
+    record = CryptoRecord(
+        symbol=symbol,
+        price=data.price,
+        volume=data.volume,
+        initial_price=data.price,
+        history=[data.price],
+        slot=registry.acquire(symbol, data.price),
+    )
+    init_book(record)
 
-    cryptos[symbol] = data
-    return data
+    cryptos[symbol] = record
+    return record
 
 
-def market_get_crypto(symbol: str):
+def market_add_crypto(data: Crypto):
+    with lock:
+        record = _register(data)
+        return record.to_api() if record else None
+
+
+def market_add_cryptos(items: list[Crypto]):
+    """Register several cryptos under a single lock acquisition.
+    Symbols that already exist are skipped; returns the newly added ones."""
+    with lock:
+        added = [_register(c) for c in items]
+        return [r.to_api() for r in added if r is not None]
+
+
+def market_get_record(symbol: str):
+    """Internal lookup that returns the live record without copying it."""
     return cryptos.get(symbol.upper())
 
 
+def _read(symbol: str):
+    """Record for an API read, caught up and marked hot. Hold the lock."""
+    record = cryptos.get(symbol.upper())
+    if record is not None:
+        touch(record)
+    return record
+
+
+def market_get_crypto(symbol: str):
+    with lock:
+        record = _read(symbol)
+        return record.to_api() if record else None
+
+
+def market_get_history(symbol: str):
+    """Copy of a symbol's price history as a numpy array, or None."""
+    with lock:
+        record = _read(symbol)
+        return record.history.copy() if record else None
+
+
+def _catch_up_chunked(records):
+    """Catch cold symbols up a few at a time, letting ticks and other
+    requests take the lock in between. Whatever is left afterwards is at
+    most a tick or two, which the caller's own pass finishes."""
+    for i in range(0, len(records), _CATCHUP_CHUNK):
+        with lock:
+            for r in records[i:i + _CATCHUP_CHUNK]:
+                if cryptos.get(r.symbol) is r:
+                    catch_up(r)
+
+
 def market_list_cryptos():
-    return list(cryptos.values())
+    # listing everything shouldn't keep everything ticking
+    with lock:
+        records = list(cryptos.values())
+    _catch_up_chunked(records)
+    with lock:
+        for r in cryptos.values():
+            catch_up(r)
+        return [r.to_api() for r in cryptos.values()]
+
+
+def market_snapshot(symbols):
+    """Copy the current state of the given symbols in one pass so every
+    entry reflects the same simulator tick. Unknown symbols are omitted."""
+    snap = {}
+    with lock:
+        for symbol in symbols:
+            r = cryptos.get(symbol)
+            if r is not None:
+                touch(r)
+                snap[symbol] = r.to_dict()
+    return snap
+
+
+def market_snapshot_arrays(symbols):
+    """Like `market_snapshot`, but returns (symbol, price, volume,
+    initial_price, history) rows with the history copied out as a numpy
+    array. Unknown symbols come back with an empty history."""
+    _catch_up_chunked([r for r in map(cryptos.get, symbols) if r is not None])
+    rows = []
+    with lock:
+        for symbol in symbols:
+            r = cryptos.get(symbol)
+            if r is None:
+                rows.append((symbol, np.nan, np.nan, np.nan, _EMPTY))
+            else:
+                catch_up(r)
+                rows.append((symbol, r.price, r.volume, r.initial_price, r.history.copy()))
+    return rows
+
+
+def market_export_stream(symbols, format: str):
+    """Stream the state and history of `symbols` (all when empty) in an
+    `app.utils.export` format, snapshotting one chunk of symbols at a time."""
+    if not symbols:
+        with lock:
+            symbols = list(cryptos)
+
+    chunks = (
+        market_snapshot_arrays(symbols[i:i + EXPORT_CHUNK])
+        for i in range(0, len(symbols), EXPORT_CHUNK)
+    )
+    # the .npy header is written first, so size the symbol field for all of them
+    symbol_size = max((len(s.encode()) for s in symbols), default=1)
+    return stream_market(chunks, len(symbols), cfg.HISTORY_LIMIT, format, symbol_size)
 
 
 def market_update_price(symbol: str, price: float):
-    c = market_get_crypto(symbol)
-    if not c:
+    with lock:
+        r = _read(symbol)
+        if not r:
+            return None
+        r.price = price
+        r.history.append(price)
+        return r.to_api()
+
+
+def market_place_order(symbol: str, owner: str, side: str, price: float, quantity: float):
+    """Submit a user limit order; it trades immediately against anything it
+    crosses and the rest joins the book. Returns the order or None."""
+    with lock:
+        r = _read(symbol)
+        if not r:
+            return None
+        order = r.book.submit(side, round_to_tick(price), quantity, owner=owner)
+        return {"symbol": r.symbol, **order.to_dict()}
+
+
+def _owned_order(r, owner: str, order_id: int):
+    order = r.book.get(order_id)
+    if order is None or order.owner != owner:
         return None
-    c.price = price
-    c.history.append(price)
-    return c
+    return order
+
+
+def market_get_order(symbol: str, owner: str, order_id: int):
+    with lock:
+        r = _read(symbol)
+        if not r:
+            return None
+        order = _owned_order(r, owner, order_id)
+        return {"symbol": r.symbol, **order.to_dict()} if order else None
+
+
+def market_cancel_order(symbol: str, owner: str, order_id: int):
+    """Cancel a resting order; already closed orders are returned as is."""
+    with lock:
+        r = _read(symbol)
+        if not r:
+            return None
+        order = _owned_order(r, owner, order_id)
+        if order is None:
+            return None
+        r.book.cancel(order_id)
+        return {"symbol": r.symbol, **order.to_dict()}
+
+
+def market_get_book(symbol: str, depth: int):
+    with lock:
+        r = _read(symbol)
+        if not r:
+            return None
+        book = r.book
+        return {
+            "symbol": r.symbol,
+            "best_bid": book.best_bid(),
+            "best_ask": book.best_ask(),
+            "microprice": _microprice(book),
+            **book.snapshot(depth),
+        }
 
 
 def market_delete_crypto(symbol: str):
-    return cryptos.pop(symbol.upper(), None)
+    with lock:
+        r = cryptos.pop(symbol.upper(), None)
+        if r is None:
+            return None
+        alert_engine.drop_symbol(r.symbol)
+        release_state(registry.release(r.symbol))
+        return r.to_api()
@@ -1,17 +1,39 @@
 """
 Portfolio-related services: interact with Supabase and portfolio DB table
 """
-from supabase import create_client
+import threading
+
+import orjson
 from app.models.crypto import CryptoPortfolioAdd
 from app.sim_config import config
 from app.utils.db import cryptos
 from app.models.crypto import Crypto
+from app.services.market import (
+    market_add_crypto,
+    market_add_cryptos,
+    market_get_crypto,
+    market_get_record,
+    market_snapshot,
+)
 
 
-supabase = create_client(
-    config.SUPABASE_URL,
-    config.SUPABASE_SERVICE_KEY
-)
+_supabase = None
+_supabase_lock = threading.Lock()
+
+
+def get_supabase():
+    """Return the shared Supabase client, creating it on first use so that
+    importing this module needs neither the SDK nor Supabase config."""
+    global _supabase
+    if _supabase is None:
+        with _supabase_lock:
+            if _supabase is None:
+                from supabase import create_client
+                _supabase = create_client(
+                    config.SUPABASE_URL,
+                    config.SUPABASE_SERVICE_KEY
+                )
+    return _supabase
 
 
 def portfolio_add_crypto(user_id: str, data: CryptoPortfolioAdd):
@@ -31,7 +53,7 @@ def portfolio_add_crypto(user_id: str, data: CryptoPortfolioAdd):
         "initial_price": initial_price,
     }
 
-    res = supabase.table(config.DB_SCHEMA.CRYPTO_EXCHANGE).insert(
+    res = get_supabase().table(config.DB_SCHEMA.CRYPTO_EXCHANGE).insert(
         new_crypto
     ).execute()
 
@@ -49,46 +71,102 @@ def portfolio_add_crypto(user_id: str, data: CryptoPortfolioAdd):
 
 
 def portfolio_delete_crypto(user_id: str, data: CryptoPortfolioAdd):
-    res = supabase.table(config.DB_SCHEMA.CRYPTO_EXCHANGE).delete().eq("user_id", user_id).eq("name", data.name).execute()
+    res = get_supabase().table(config.DB_SCHEMA.CRYPTO_EXCHANGE).delete().eq("user_id", user_id).eq("name", data.name).execute()
     if getattr(res, 'error', None):
         return None
     return res.data
 
 
 def portfolio_get_user_cryptos(user_id: str):
-    res = supabase.table(config.DB_SCHEMA.CRYPTO_EXCHANGE).select("*").eq("user_id", str(user_id)).execute()
+    res = get_supabase().table(config.DB_SCHEMA.CRYPTO_EXCHANGE).select("*").eq("user_id", str(user_id)).execute()
     return res.data
 
 
-def portfolio_seed_crypto_from_row(row: dict):
-    """Create an in-memory Crypto object from a DB row if possible and register it.
-    Returns the created Crypto or None."""
-    name = (row.get('name') or row.get('symbol') or '').upper()
-    if not name:
-        return None
+def _row_symbol(row: dict) -> str:
+    return (row.get('name') or row.get('symbol') or '').upper()
 
-    try:
-        init_price = float(row.get('initial_price') or row.get('price') or 0.0)
-    except (TypeError, ValueError):
-        init_price = 0.0
 
-    try:
-        vol = float(row.get('volume') or 0.0)
-    except (TypeError, ValueError):
-        vol = 0.0
+def _row_float(row: dict, *keys) -> float:
+    for key in keys:
+        value = row.get(key)
+        if value:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return 0.0
+    return 0.0
 
+
+def _crypto_from_row(row: dict):
+    """Build (but don't register) a Crypto from a DB row, or None if the row
+    carries no usable price."""
+    name = _row_symbol(row)
+    if not name:
+        return None
+
+    init_price = _row_float(row, 'initial_price', 'price')
     if init_price <= 0.0:
         return None
 
-    c = Crypto(
+    return Crypto(
         symbol=name,
         price=init_price,
-        volume=vol,
+        volume=_row_float(row, 'volume'),
         initial_price=init_price,
         history=[],
         order_book={},
     )
 
-    # register in-memory
-    cryptos[name] = c
-    return c
+
+def portfolio_seed_crypto_from_row(row: dict):
+    """Create an in-memory Crypto object from a DB row if possible and register it.
+    Returns the created Crypto or None."""
+    c = _crypto_from_row(row)
+    if c is None:
+        return None
+    return market_add_crypto(c) or market_get_crypto(c.symbol)
+
+
+def portfolio_hydrate_rows(rows) -> bytes:
+    """Join portfolio rows against the live market and return the JSON array
+    the frontend expects.
+
+    Symbols are deduplicated up front: missing ones are seeded in one bulk
+    registration, the live state is read from a single market snapshot and
+    each symbol is encoded once, so the cost grows with the number of unique
+    symbols rather than rows x history length.
+    """
+    named = []
+    first_row = {}
+    for r in rows or []:
+        name = _row_symbol(r)
+        if not name:
+            continue
+        named.append((name, r))
+        first_row.setdefault(name, r)
+
+    missing = [name for name in first_row if market_get_record(name) is None]
+    if missing:
+        seeds = [_crypto_from_row(first_row[name]) for name in missing]
+        market_add_cryptos([c for c in seeds if c is not None])
+
+    snapshot = market_snapshot(first_row)
+    # simulator state may hold numpy scalars
+    encoded = {name: orjson.dumps(live, option=orjson.OPT_SERIALIZE_NUMPY) for name, live in snapshot.items()}
+
+    parts = []
+    for name, r in named:
+        body = encoded.get(name)
+        if body is None:
+            price = _row_float(r, 'initial_price', 'price')
+            body = orjson.dumps({
+                'symbol': name,
+                'price': price,
+                'volume': _row_float(r, 'volume'),
+                'history': [],
+                'initial_price': price,
+                'order_book': {},
+            })
+        parts.append(body)
+
+    return b"[" + b",".join(parts) + b"]"
@@ -1,4 +1,5 @@
 import os
+import pathlib
 
 TICK_SPEED = 0.5
 HISTORY_LIMIT = 500
@@ -6,6 +7,15 @@ HISTORY_LIMIT = 500
 MU = 0.00005
 SIGMA = 0.005
 ORDER_BOOK_DEPTH = 6
+CLOSED_ORDER_LIMIT = 1000
+# symbols nobody has read for this many ticks stop ticking until the next read
+COLD_AFTER_STEPS = 240
+# cold symbols are caught up in the background about every this many ticks
+CATCHUP_BATCH = 64
+# ticks of market factors kept for catch-up (an hour); 24 bytes each
+CATCHUP_WINDOW = int(60 * 60 / TICK_SPEED)
+ALERTS_PER_USER = 10000
+ALERT_QUEUE_LIMIT = 1000  # undelivered fired alerts kept per user
 FUNDAMENTAL_WEIGHT = 0.000015
 
 SIGMA0 = 0.004
@@ -36,6 +46,30 @@ STABLECOIN_TOKENS = ("USDT", "USDC", "DAI", "TUSD", "FDUSD", "USDP")
 GRANULARITY_LEVELS = ["1s", "5s", "1m", "30m", "1h", "90m", "1d", "5d", "1wk", "1mo", "3mo", "6mo", "1y", "5y", "10y"]
 
 
+def _load_env():
+    """Load the repo-root .env (then backend/.env, if any) exactly once, before
+    any Config reads the environment. Values already set are never overridden."""
+    here = pathlib.Path(__file__).resolve()
+    for env_path in (here.parents[2] / '.env', here.parents[1] / '.env'):
+        if env_path.exists():
+            from dotenv import load_dotenv
+            load_dotenv(env_path)
+
+
+def _parse_seed(value):
+    """SIM_SEED as a non-negative int (None when unset), so a bad value fails
+    at startup rather than on the first listing."""
+    if not value:
+        return None
+    try:
+        seed = int(value)
+    except ValueError:
+        seed = None
+    if seed is None or seed < 0:
+        raise ValueError(f"SIM_SEED must be a non-negative integer, got {value!r}")
+    return seed
+
+
 class DBSchema:
     """
     Database Schema
@@ -53,17 +87,22 @@ class Config:
         self.SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
         self.DB_SCHEMA = DBSchema()
         self.LOGGER = 'uvicorn.error'
+        # Global simulator seed; unset draws fresh entropy (see app/utils/rng.py)
+        self.SIM_SEED = _parse_seed(os.getenv("SIM_SEED"))
+        # Skip ticking cold symbols and catch them up on read (see simulator.live_tick)
+        self.SIM_ADAPTIVE_TICKS = os.getenv("SIM_ADAPTIVE_TICKS", "true").lower() in ("1", "true", "yes")
+        # Session recording / replay (see app/utils/replay.py)
+        self.SIM_RECORD_PATH = os.getenv("SIM_RECORD_PATH")
+        self.SIM_REPLAY_PATH = os.getenv("SIM_REPLAY_PATH")
+        self.SIM_REPLAY_SPEED = os.getenv("SIM_REPLAY_SPEED", "1")  # multiple of real time, or "max"
+        self.SIM_REPLAY_START = int(os.getenv("SIM_REPLAY_START") or 0)
+        self.SIM_REPLAY_LOOP = os.getenv("SIM_REPLAY_LOOP", "").lower() in ("1", "true", "yes")
 
 class DevConfig(Config):
     """
     Development Configs
     """
     DEBUG = True
-    def __init__(self):
-        from dotenv import load_dotenv
-        load_dotenv()
-
-        super().__init__()
 
 class ProdConfig(Config):
     """
@@ -73,6 +112,8 @@ class ProdConfig(Config):
 
 
 # Setup API Config
+_load_env()
+
 if os.getenv("ENV") == "PROD":
     config = ProdConfig()
 else:
@@ -0,0 +1,307 @@
+"""
+Price alerts, checked after every tick.
+
+Each symbol with alerts has two one-sided indexes. One holds the thresholds
+above the price, which fire when the price rises through them. The other
+holds the thresholds below it, keyed by the negated price. Thresholds stay
+sorted and every live one is still ahead of the price, so the alerts a move
+crosses are always at the front of one index. A tick finds them with a
+single bisect and drops them by slicing, in O(log n + hits). Ranges and
+percent bands are intervals, with one entry in each index.
+
+New thresholds go into a short sorted list that is searched the same way.
+It is merged into the arrays in bulk on the API side, never inside the
+tick. Cancelled alerts are only forgotten: their entries are skipped when
+reached and compacted away once they pile up.
+
+The crossed ids go to a backlog, which is turned into delivered alerts a
+bounded batch per tick, and in full before any API call reads or changes
+alerts. A burst of hits is therefore spread over the following ticks instead
+of stalling one. Fired alerts are queued per owner until they are polled.
+"""
+import bisect
+import itertools
+from collections import deque
+
+import numpy as np
+
+import app.sim_config as cfg
+from app.utils import simulator
+
+ABOVE = "above"
+BELOW = "below"
+RANGE = "range"
+PERCENT = "percent"
+
+ACTIVE = "active"
+FIRED = "fired"
+CANCELLED = "cancelled"
+
+_MERGE_MIN = 256
+_SETTLE_PER_TICK = 4096
+_alert_ids = itertools.count(1)
+
+
+class Alert:
+    __slots__ = ("id", "owner", "symbol", "kind", "low", "high", "percent", "status", "fired_price", "fired_step")
+
+    def __init__(self, owner, symbol, kind, low=None, high=None, percent=None):
+        self.id = next(_alert_ids)
+        self.owner = owner
+        self.symbol = symbol
+        self.kind = kind
+        self.low = low  # fires at or below
+        self.high = high  # fires at or above
+        self.percent = percent
+        self.status = ACTIVE
+        self.fired_price = None
+        self.fired_step = None
+
+    @property
+    def entries(self):
+        return (self.low is not None) + (self.high is not None)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "symbol": self.symbol,
+            "kind": self.kind,
+            "low": self.low,
+            "high": self.high,
+            "percent": self.percent,
+            "status": self.status,
+            "fired_price": self.fired_price,
+            "fired_step": self.fired_step,
+        }
+
+
+class _Side:
+    """Sorted thresholds on one side of the price, keyed so the first to be
+    crossed sorts first."""
+    __slots__ = ("keys", "ids", "pending_keys", "pending_ids")
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.float64)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.pending_keys = []
+        self.pending_ids = []
+
+    def add(self, key, alert_id):
+        i = bisect.bisect_right(self.pending_keys, key)
+        self.pending_keys.insert(i, key)
+        self.pending_ids.insert(i, alert_id)
+        # merging is O(n), so let the list grow with the array
+        if len(self.pending_keys) >= max(_MERGE_MIN, len(self.keys) >> 6):
+            self.merge()
+
+    def merge(self):
+        if not self.pending_keys:
+            return
+        pos = np.searchsorted(self.keys, self.pending_keys, side="right")
+        self.keys = np.insert(self.keys, pos, self.pending_keys)
+        self.ids = np.insert(self.ids, pos, self.pending_ids)
+        self.pending_keys = []
+        self.pending_ids = []
+
+    def pop_through(self, key):
+        """Remove and return the ids of every threshold with key <= `key`,
+        as an array (None when nothing was crossed)."""
+        hits = None
+        keys = self.keys
+        if len(keys) and keys[0] <= key:
+            end = int(np.searchsorted(keys, key, side="right"))
+            hits = self.ids[:end]
+            # views: the memory goes at the next merge
+            self.keys = keys[end:]
+            self.ids = self.ids[end:]
+        pending = self.pending_keys
+        if pending and pending[0] <= key:
+            end = bisect.bisect_right(pending, key)
+            crossed = np.array(self.pending_ids[:end], dtype=np.int64)
+            hits = crossed if hits is None else np.concatenate((hits, crossed))
+            del pending[:end], self.pending_ids[:end]
+        return hits
+
+    def compact(self, live):
+        """Drop entries whose alert id is not in the `live` id array."""
+        self.merge()
+        keep = np.isin(self.ids, live)
+        self.keys = self.keys[keep]
+        self.ids = self.ids[keep]
+
+    def alert_ids(self):
+        return self.ids.tolist() + self.pending_ids
+
+
+class _SymbolAlerts:
+    __slots__ = ("record", "price", "up", "down", "live", "dead")
+
+    def __init__(self, record):
+        self.record = record
+        self.price = record.price  # price the indexes were last checked at
+        self.up = _Side()
+        self.down = _Side()
+        self.live = 0  # active alerts
+        self.dead = 0  # index entries left behind by cancelled/fired alerts
+
+
+class AlertEngine:
+    """Registered alerts and per-owner delivery queues. A tick listener, so
+    every method expects the market lock to be held."""
+
+    def __init__(self):
+        self._alerts = {}  # id -> active Alert
+        self._owned = {}  # owner -> set of active ids
+        self._symbols = {}  # symbol -> _SymbolAlerts
+        self._queues = {}  # owner -> deque of fired alerts
+        self._backlog = deque()  # [index, crossed ids, price, step] not yet settled
+
+    def add(self, record, owner, kind, low=None, high=None, percent=None):
+        """Register an alert on `record`. One whose condition already holds
+        fires straight away. Raises ValueError past ALERTS_PER_USER."""
+        self._settle()
+        owned = self._owned.setdefault(owner, set())
+        if len(owned) >= cfg.ALERTS_PER_USER:
+            raise ValueError(f"at most {cfg.ALERTS_PER_USER} active alerts per user")
+
+        alert = Alert(owner, record.symbol, kind, low, high, percent)
+        simulator.add_tick_listener(self)
+        step = simulator.current_step()
+
+        idx = self._symbols.get(record.symbol)
+        if idx is not None:
+            # the indexes must be current before anything is added relative to them
+            self._check(idx, step)
+            self._settle()
+            idx = self._symbols.get(record.symbol)
+
+        price = record.price
+        if (high is not None and price >= high) or (low is not None and price <= low):
+            self._deliver(alert, price, step)
+            return alert
+
+        if idx is None:
+            idx = self._symbols[record.symbol] = _SymbolAlerts(record)
+            simulator.pin(record)
+        self._alerts[alert.id] = alert
+        owned.add(alert.id)
+        if high is not None:
+            idx.up.add(high, alert.id)
+        if low is not None:
+            idx.down.add(-low, alert.id)
+        idx.live += 1
+        return alert
+
+    def cancel(self, owner, alert_id):
+        self._settle()
+        alert = self._alerts.get(alert_id)
+        if alert is None or alert.owner != owner:
+            return None
+        del self._alerts[alert_id]
+        self._owned[owner].discard(alert_id)
+        alert.status = CANCELLED
+
+        idx = self._symbols[alert.symbol]
+        idx.live -= 1
+        idx.dead += alert.entries
+        self._tidy(idx)
+        return alert
+
+    def list(self, owner):
+        self._settle()
+        return [self._alerts[i].to_dict() for i in sorted(self._owned.get(owner, ()))]
+
+    def poll(self, owner, limit):
+        """Take up to `limit` fired alerts off the owner's queue, oldest first."""
+        self._settle()
+        queue = self._queues.get(owner)
+        if not queue:
+            return []
+        out = [queue.popleft() for _ in range(min(limit, len(queue)))]
+        if not queue:
+            del self._queues[owner]
+        return out
+
+    def drop_symbol(self, symbol):
+        """Forget every alert on a delisted symbol."""
+        self._settle()
+        idx = self._symbols.pop(symbol, None)
+        if idx is None:
+            return
+        for alert_id in idx.up.alert_ids() + idx.down.alert_ids():
+            alert = self._alerts.pop(alert_id, None)
+            if alert is not None:
+                alert.status = CANCELLED
+                self._owned[alert.owner].discard(alert_id)
+
+    def __call__(self, step):
+        for idx in self._symbols.values():
+            if idx.record.price != idx.price:
+                self._check(idx, step)
+        self._settle(_SETTLE_PER_TICK)
+
+    def _check(self, idx, step):
+        price = idx.record.price
+        prev = idx.price
+        if price == prev:
+            return
+        idx.price = price
+        hits = idx.up.pop_through(price) if price > prev else idx.down.pop_through(-price)
+        if hits is not None:
+            self._backlog.append([idx, hits, price, step])
+
+    def _settle(self, budget=None):
+        """Deliver crossed alerts from the backlog, at most `budget` ids."""
+        backlog = self._backlog
+        while backlog and (budget is None or budget > 0):
+            entry = backlog[0]
+            idx, hits, price, step = entry
+            if budget is not None and len(hits) > budget:
+                hits, entry[1] = hits[:budget], hits[budget:]
+            else:
+                backlog.popleft()
+            if budget is not None:
+                budget -= len(hits)
+
+            for alert_id in hits.tolist():
+                alert = self._alerts.pop(alert_id, None)
+                if alert is None:
+                    # a compaction may have counted this one already
+                    idx.dead = max(0, idx.dead - 1)
+                    continue
+                self._owned[alert.owner].discard(alert_id)
+                idx.live -= 1
+                # the other end of an interval is left behind
+                idx.dead += alert.entries - 1
+                self._deliver(alert, price, step)
+
+            if self._symbols.get(idx.record.symbol) is idx:
+                self._tidy(idx)
+
+    def _tidy(self, idx):
+        """Release an index with no live alerts left, or compact one that is
+        mostly entries of cancelled and fired alerts."""
+        if idx.live == 0:
+            self._release(idx.record.symbol)
+        elif idx.dead > max(_MERGE_MIN, idx.live):
+            # runs inside the tick too, so keep it vectorized
+            live = np.fromiter(self._alerts, dtype=np.int64, count=len(self._alerts))
+            idx.up.compact(live)
+            idx.down.compact(live)
+            idx.dead = 0
+
+    def _deliver(self, alert, price, step):
+        alert.status = FIRED
+        alert.fired_price = price
+        alert.fired_step = step
+        queue = self._queues.get(alert.owner)
+        if queue is None:
+            queue = self._queues[alert.owner] = deque(maxlen=cfg.ALERT_QUEUE_LIMIT)
+        queue.append(alert.to_dict())
+
+    def _release(self, symbol):
+        idx = self._symbols.pop(symbol)
+        simulator.unpin(idx.record)
+
+
+alert_engine = AlertEngine()
@@ -1 +1,7 @@
+import threading
+
 cryptos = {}
+
+# Guards `cryptos` against the simulator thread so readers see one
+# consistent market state and registration can't race a running tick.
+lock = threading.RLock()
@@ -0,0 +1,139 @@
+"""
+Binary encoders for market data: NumPy `.npy` and Arrow IPC streams.
+
+Both encoders work on numpy arrays copied out of the market under the lock
+and hand their memory to the output without per-value conversion. pyarrow
+is optional and only imported when an Arrow export is requested.
+"""
+import importlib.util
+import io
+
+import numpy as np
+
+EXPORT_FORMATS = ("npy", "arrow")
+EXPORT_CHUNK = 256  # symbols per streamed chunk
+
+MEDIA_TYPES = {
+    "npy": "application/octet-stream",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def arrow_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def market_dtype(maxlen: int, symbol_size: int = 32):
+    """One fixed-size record per symbol; `history` is NaN-padded past `length`.
+    numpy silently truncates `symbol` past `symbol_size` bytes."""
+    return np.dtype([
+        ('symbol', f'S{max(1, symbol_size)}'),
+        ('price', '<f8'),
+        ('volume', '<f8'),
+        ('initial_price', '<f8'),
+        ('length', '<i4'),
+        ('history', '<f8', (maxlen,)),
+    ])
+
+
+def npy_header(dtype, n: int) -> bytes:
+    buf = io.BytesIO()
+    np.lib.format.write_array_header_1_0(buf, {
+        'descr': np.lib.format.dtype_to_descr(dtype),
+        'fortran_order': False,
+        'shape': (n,),
+    })
+    return buf.getvalue()
+
+
+def npy_market_records(rows, dtype):
+    """Pack snapshot rows (symbol, price, volume, initial_price, history) into
+    the body bytes of a `market_dtype` array."""
+    symbols, prices, volumes, initials, histories = zip(*rows)
+    out = np.empty(len(rows), dtype=dtype)
+    out['symbol'] = [s.encode() for s in symbols]
+    out['price'] = prices
+    out['volume'] = volumes
+    out['initial_price'] = initials
+    out['length'] = [len(h) for h in histories]
+    hist = out['history']
+    hist.fill(np.nan)
+    for i, h in enumerate(histories):
+        hist[i, :len(h)] = h
+    return out.data
+
+
+def _arrow_market_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ('symbol', pa.string()),
+        ('price', pa.float64()),
+        ('volume', pa.float64()),
+        ('initial_price', pa.float64()),
+        ('history', pa.list_(pa.float64())),
+    ])
+
+
+def _arrow_market_batch(rows, schema):
+    import pyarrow as pa
+    symbols, prices, volumes, initials, histories = zip(*rows)
+    lengths = np.fromiter((len(h) for h in histories), dtype=np.int32, count=len(histories))
+    offsets = np.zeros(len(histories) + 1, dtype=np.int32)
+    np.cumsum(lengths, out=offsets[1:])
+    values = np.concatenate(histories) if histories else np.empty(0, dtype=np.float64)
+    return pa.RecordBatch.from_arrays([
+        pa.array(symbols, type=pa.string()),
+        pa.array(np.asarray(prices, dtype=np.float64)),
+        pa.array(np.asarray(volumes, dtype=np.float64)),
+        pa.array(np.asarray(initials, dtype=np.float64)),
+        pa.ListArray.from_arrays(pa.array(offsets), pa.array(values)),
+    ], schema=schema)
+
+
+def stream_market(chunks, n: int, maxlen: int, format: str, symbol_size: int = 32):
+    """Yield an export of `n` symbols as bytes, one piece per chunk of
+    snapshot rows, so only one chunk is held in memory at a time. The header
+    comes first, so `symbol_size` must fit the longest symbol of every chunk."""
+    if format == "npy":
+        dtype = market_dtype(maxlen, symbol_size)
+        yield npy_header(dtype, n)
+        for rows in chunks:
+            if rows:
+                yield npy_market_records(rows, dtype)
+        return
+
+    import pyarrow as pa
+    schema = _arrow_market_schema()
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for rows in chunks:
+            if rows:
+                writer.write_batch(_arrow_market_batch(rows, schema))
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+def _drain(sink) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def encode_columns(columns: dict, format: str) -> bytes:
+    """Encode equal-length numpy columns (e.g. candles) as one `.npy`
+    structured array or one Arrow IPC stream."""
+    if format == "npy":
+        dtype = np.dtype([(k, v.dtype.str) for k, v in columns.items()])
+        n = len(next(iter(columns.values()), ()))
+        out = np.empty(n, dtype=dtype)
+        for k, v in columns.items():
+            out[k] = v
+        return npy_header(dtype, n) + out.tobytes()
+
+    import pyarrow as pa
+    batch = pa.record_batch({k: pa.array(v) for k, v in columns.items()})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue()
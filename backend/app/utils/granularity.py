@@ -2,8 +2,12 @@
 Utility functions for handling granularity levels and aggregating price history.
 """
 
+import numpy as np
+
 import app.sim_config as cfg
 
+CANDLE_FORMATS = ("json", "npy", "arrow")
+
 def _granularity_to_seconds(g: str) -> int:
     """Convert a granularity label from cfg.GRANULARITY_LEVELS to seconds.
     """
@@ -36,41 +40,68 @@ def _granularity_to_seconds(g: str) -> int:
     raise ValueError(f"unsupported granularity unit: {unit}")
 
 
-def get_history_for_granularity(history, granularity: str):
+def _bucket_seconds(granularity: str) -> int:
     if granularity not in cfg.GRANULARITY_LEVELS:
         raise ValueError(f"granularity '{granularity}' not supported; allowed: {cfg.GRANULARITY_LEVELS}")
 
     bucket_seconds = _granularity_to_seconds(granularity)
     if bucket_seconds <= 0:
         raise ValueError("bucket size must be > 0 seconds")
+    return bucket_seconds
+
+
+def candle_columns(history, granularity: str):
+    """OHLC candles as a dict of equal-length numpy columns, computed with one
+    reduceat per column instead of a Python loop over buckets."""
+    bucket_size = _bucket_seconds(granularity)
+
+    prices = np.asarray(history, dtype=np.float64)
+    n = len(prices)
+    starts = np.arange(0, n, bucket_size, dtype=np.int64)
+    ends = np.minimum(starts + bucket_size, n)
 
-    bucket_size = bucket_seconds
+    if n == 0:
+        empty = np.empty(0, dtype=np.float64)
+        return {
+            'start_index': starts, 'open': empty, 'high': empty,
+            'low': empty, 'close': empty, 'count': starts,
+        }
 
-    if not history:
-        return []
+    return {
+        'start_index': starts,
+        'open': prices[starts],
+        'high': np.maximum.reduceat(prices, starts),
+        'low': np.minimum.reduceat(prices, starts),
+        'close': prices[ends - 1],
+        'count': ends - starts,
+    }
 
-    results = []
 
-    n = len(history)
-    idx = 0
-    while idx < n:
-        chunk = history[idx: idx + bucket_size]
-        if not chunk:
-            break
-        o = float(chunk[0])
-        c = float(chunk[-1])
-        hi = float(max(chunk))
-        lo = float(min(chunk))
-        results.append({
+def get_history_for_granularity(history, granularity: str, format: str = "json"):
+    """Aggregate a price history into candles.
+
+    `format="json"` returns the list of candle dicts; `"npy"` / `"arrow"`
+    return the same candles as columns for `app.utils.export`.
+    """
+    if format not in CANDLE_FORMATS:
+        raise ValueError(f"format '{format}' not supported; allowed: {CANDLE_FORMATS}")
+
+    cols = candle_columns(history, granularity)
+    if format != "json":
+        return cols
+
+    bucket_seconds = _bucket_seconds(granularity)
+    rows = zip(*(cols[k].tolist() for k in ('start_index', 'open', 'high', 'low', 'close', 'count')))
+    return [
+        {
             'start_index': idx,
             'open': o,
             'high': hi,
             'low': lo,
             'close': c,
-            'count': len(chunk),
+            'count': count,
             'bucket_size_seconds': bucket_seconds,
             'granularity': granularity,
-        })
-        idx += bucket_size
-
-    return results
+        }
+        for idx, o, hi, lo, c, count in rows
+    ]
@@ -0,0 +1,71 @@
+"""
+Bounded price history backed by a contiguous float64 buffer.
+
+The buffer is twice the history limit. Appends write at the end, and when
+the buffer fills up the newest `maxlen - 1` values are moved back to the
+front, so the live window is always one contiguous slice that can be handed
+to numpy, Arrow or the wire without being rebuilt element by element.
+"""
+import numpy as np
+
+import app.sim_config as cfg
+
+
+class PriceHistory:
+    __slots__ = ("_buf", "_maxlen", "_start", "_end")
+
+    def __init__(self, values=(), maxlen=None):
+        self._maxlen = maxlen or cfg.HISTORY_LIMIT
+        self._buf = np.empty(2 * self._maxlen, dtype=np.float64)
+        self._start = 0
+        self._end = 0
+        if len(values):
+            self.extend(values)
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __getitem__(self, i):
+        return self.view()[i].tolist()
+
+    @property
+    def maxlen(self):
+        return self._maxlen
+
+    def _compact(self, keep):
+        n = min(keep, len(self))
+        self._buf[:n] = self._buf[self._end - n:self._end]
+        self._start, self._end = 0, n
+
+    def append(self, value):
+        if self._end == len(self._buf):
+            self._compact(self._maxlen - 1)
+        self._buf[self._end] = value
+        self._end += 1
+        if self._end - self._start > self._maxlen:
+            self._start += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=np.float64)[-self._maxlen:]
+        n = len(values)
+        if self._end + n > len(self._buf):
+            self._compact(self._maxlen - n)
+        self._buf[self._end:self._end + n] = values
+        self._end += n
+        self._start = max(self._start, self._end - self._maxlen)
+
+    def view(self):
+        """Read-only view of the live window. It shares memory with the
+        buffer, so copy it (under the market lock) before the next tick."""
+        v = self._buf[self._start:self._end]
+        v.flags.writeable = False
+        return v
+
+    def copy(self):
+        return self._buf[self._start:self._end].copy()
+
+    def tolist(self):
+        return self._buf[self._start:self._end].tolist()
@@ -0,0 +1,262 @@
+"""
+Price-time priority limit order book.
+
+Each side keeps a map of price level -> FIFO queue of orders, plus a heap
+of level prices so the best bid/ask is always the heap top. Inserting into
+a new level is O(log n), joining an existing one O(1). Cancels only mark
+the order dead and fix the level totals. Dead orders are dropped when they
+reach the front of their queue, or all at once when they outnumber the live
+ones, and empty levels when they reach the top of the heap.
+
+Synthetic liquidity from the simulator lives in the same book as user
+orders. It is swapped out wholesale every tick by `replace_synthetic`, and
+`match` then crosses whatever overlaps.
+"""
+import heapq
+import itertools
+from collections import OrderedDict, deque
+
+import app.sim_config as cfg
+
+BUY = "buy"
+SELL = "sell"
+
+OPEN = "open"
+PARTIAL = "partial"
+FILLED = "filled"
+CANCELLED = "cancelled"
+
+_EPS = 1e-12
+_order_ids = itertools.count(1)
+_seq = itertools.count()
+
+
+class Order:
+    __slots__ = ("id", "side", "price", "qty", "filled", "owner", "seq", "status", "fills")
+
+    def __init__(self, side, price, qty, owner=None):
+        self.id = next(_order_ids)
+        self.side = side
+        self.price = float(price)
+        self.qty = float(qty)  # remaining
+        self.filled = 0.0
+        self.owner = owner  # None for synthetic liquidity
+        self.seq = next(_seq)
+        self.status = OPEN
+        self.fills = [] if owner is not None else None
+
+    @property
+    def live(self):
+        return self.status in (OPEN, PARTIAL)
+
+    def _fill(self, price, qty):
+        self.qty -= qty
+        self.filled += qty
+        if self.qty <= _EPS:
+            self.qty = 0.0
+            self.status = FILLED
+        else:
+            self.status = PARTIAL
+        if self.fills is not None:
+            self.fills.append((price, qty))
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "side": self.side,
+            "price": self.price,
+            "quantity": self.qty + self.filled,
+            "remaining": self.qty,
+            "filled": self.filled,
+            "status": self.status,
+            "fills": [{"price": p, "quantity": q} for p, q in self.fills or ()],
+        }
+
+
+class _Side:
+    __slots__ = ("sign", "levels", "qty", "count", "heap", "in_heap")
+
+    def __init__(self, sign):
+        self.sign = sign  # -1 for bids so the heap top is the highest price
+        self.levels = {}  # price -> deque[Order]
+        self.qty = {}  # price -> live quantity
+        self.count = {}  # price -> live order count
+        self.heap = []
+        self.in_heap = set()
+
+    def best(self):
+        heap = self.heap
+        while heap:
+            price = heap[0] * self.sign
+            if price in self.levels:
+                return price
+            heapq.heappop(heap)
+            self.in_heap.discard(price)
+        return None
+
+    def add(self, order):
+        price = order.price
+        queue = self.levels.get(price)
+        if queue is None:
+            queue = self.levels[price] = deque()
+            self.qty[price] = 0.0
+            self.count[price] = 0
+            if price not in self.in_heap:
+                heapq.heappush(self.heap, price * self.sign)
+                self.in_heap.add(price)
+        queue.append(order)
+        self.qty[price] += order.qty
+        self.count[price] += 1
+
+    def reduce(self, price, qty, closed):
+        """Take `qty` off a level; `closed` when the order left the book."""
+        self.qty[price] -= qty
+        if closed:
+            self.count[price] -= 1
+            if self.count[price] == 0:
+                del self.levels[price], self.qty[price], self.count[price]
+                # emptied levels deep in the heap only surface when the price
+                # comes back; rebuild once they outnumber the live ones
+                if len(self.heap) > 2 * len(self.levels) + 64:
+                    self.heap = [p * self.sign for p in self.levels]
+                    heapq.heapify(self.heap)
+                    self.in_heap = set(self.levels)
+            elif len(self.levels[price]) > 2 * self.count[price] + 8:
+                # a resting order keeps its level alive, so dead ones queued
+                # behind it (replaced synthetic quotes) never reach the front
+                self.levels[price] = deque(o for o in self.levels[price] if o.live)
+
+    def front(self, price):
+        queue = self.levels[price]
+        while not queue[0].live:
+            queue.popleft()
+        return queue[0]
+
+    def top(self, n):
+        prices = heapq.nsmallest(n, (p * self.sign for p in self.levels))
+        return [(p * self.sign, self.qty[p * self.sign]) for p in prices]
+
+
+class LimitOrderBook:
+    def __init__(self):
+        self.bids = _Side(-1)
+        self.asks = _Side(1)
+        self._orders = {}
+        self._closed = OrderedDict()  # recently filled/cancelled user orders
+        self._synthetic = []
+        self.synthetic_book = None  # last `replace_synthetic` input
+        self.user_orders = 0  # resting user orders
+
+    def _side(self, side):
+        return self.bids if side == BUY else self.asks
+
+    def best_bid(self):
+        return self.bids.best()
+
+    def best_ask(self):
+        return self.asks.best()
+
+    def level_qty(self, side, price):
+        return self._side(side).qty.get(price, 0.0)
+
+    def get(self, order_id):
+        return self._orders.get(order_id) or self._closed.get(order_id)
+
+    def _retire(self, order):
+        if order.owner is None:
+            return
+        self._closed[order.id] = order
+        if len(self._closed) > cfg.CLOSED_ORDER_LIMIT:
+            self._closed.popitem(last=False)
+
+    @property
+    def has_synthetic(self):
+        return bool(self._synthetic)
+
+    def _rest(self, order):
+        self._side(order.side).add(order)
+        self._orders[order.id] = order
+        if order.owner is not None:
+            self.user_orders += 1
+
+    def _unrest(self, order):
+        del self._orders[order.id]
+        if order.owner is not None:
+            self.user_orders -= 1
+
+    def _trade(self, maker, taker, qty):
+        price = maker.price
+        maker._fill(price, qty)
+        taker._fill(price, qty)
+        for o in (maker, taker):
+            if o.id in self._orders:
+                self._side(o.side).reduce(o.price, qty, not o.live)
+                if not o.live:
+                    self._unrest(o)
+                    self._retire(o)
+
+    def submit(self, side, price, qty, owner=None):
+        """Match an incoming limit order against the opposite side, then rest
+        whatever is left. Returns the order."""
+        order = Order(side, price, qty, owner)
+        opposite = self.asks if side == BUY else self.bids
+        crosses = (lambda p: p <= order.price) if side == BUY else (lambda p: p >= order.price)
+
+        while order.live:
+            best = opposite.best()
+            if best is None or not crosses(best):
+                break
+            maker = opposite.front(best)
+            self._trade(maker, order, min(maker.qty, order.qty))
+
+        if order.live:
+            self._rest(order)
+        else:
+            self._retire(order)
+        return order
+
+    def cancel(self, order_id):
+        order = self._orders.get(order_id)
+        if order is None:
+            return None
+        self._unrest(order)
+        order.status = CANCELLED
+        self._side(order.side).reduce(order.price, order.qty, True)
+        self._retire(order)
+        return order
+
+    def match(self):
+        """Cross resting orders until the book is no longer locked. The older
+        order of each pair is the maker and sets the trade price."""
+        while True:
+            bid, ask = self.bids.best(), self.asks.best()
+            if bid is None or ask is None or bid < ask:
+                return
+            b, a = self.bids.front(bid), self.asks.front(ask)
+            maker, taker = (b, a) if b.seq < a.seq else (a, b)
+            self._trade(maker, taker, min(b.qty, a.qty))
+
+    def replace_synthetic(self, book):
+        """Swap the simulator's liquidity for a fresh `create_order_book`
+        result; user orders are left in place."""
+        for order_id in self._synthetic:
+            self.cancel(order_id)
+        synthetic = []
+        for side, levels in ((BUY, book["bids"]), (SELL, book["asks"])):
+            for price, size in levels:
+                order = Order(side, price, size)
+                self._rest(order)
+                synthetic.append(order.id)
+        self._synthetic = synthetic
+        self.synthetic_book = book
+
+    def depth_volume(self, depth):
+        """Resting quantity over the best `depth` levels of each side."""
+        return (
+            float(sum(q for _, q in self.bids.top(depth))),
+            float(sum(q for _, q in self.asks.top(depth))),
+        )
+
+    def snapshot(self, depth):
+        """Aggregated top of book in the `create_order_book` shape."""
+        return {"bids": self.bids.top(depth), "asks": self.asks.top(depth)}
@@ -0,0 +1,103 @@
+"""
+Dense symbol registry.
+
+Every listed symbol gets a small integer slot. Per-symbol stores (simulator
+state, traits, ...) are plain lists indexed by that slot, so the tick loop
+never hashes symbol strings. Slots freed by deleting a symbol are handed out
+again lowest-first, which keeps the tables dense.
+
+Callers are expected to hold `app.utils.db.lock` when acquiring or releasing.
+"""
+import heapq
+from bisect import bisect_right
+
+import app.sim_config as cfg
+
+# Price band upper bounds and the tick size used inside each band
+TICK_BOUNDS = (1.0, 10.0, 100.0, 1000.0, 20000.0)
+TICK_SIZES = (0.0001, 0.001, 0.01, 0.1, 1.0, 5.0)
+TICK_LOWER = (float("-inf"),) + TICK_BOUNDS
+TICK_UPPER = TICK_BOUNDS + (float("inf"),)
+
+STABLE_BAND = 0.003
+
+
+def tick_index(price: float) -> int:
+    return bisect_right(TICK_BOUNDS, price)
+
+
+def is_stablecoin(symbol: str) -> bool:
+    return any(k in symbol.upper() for k in cfg.STABLECOIN_TOKENS)
+
+
+class SymbolTraits:
+    """
+    Static per-symbol facts computed once at registration. `tick_idx` is a
+    cache of the last tick band the price was in and is refreshed by the
+    simulator whenever the price leaves it.
+    """
+    __slots__ = ("stable", "band_lo", "band_hi", "tick_idx")
+
+    def __init__(self, symbol: str, initial_price: float):
+        self.stable = is_stablecoin(symbol)
+        if self.stable:
+            self.band_lo = initial_price * (1.0 - STABLE_BAND)
+            self.band_hi = initial_price * (1.0 + STABLE_BAND)
+        else:
+            self.band_lo = 0.0
+            self.band_hi = float("inf")
+        self.tick_idx = tick_index(initial_price)
+
+
+class SymbolRegistry:
+    def __init__(self):
+        self._slots = {}
+        self._symbols = []
+        self._free = []
+        self.traits = []
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, symbol):
+        return symbol in self._slots
+
+    @property
+    def capacity(self) -> int:
+        return len(self._symbols)
+
+    def slot(self, symbol: str):
+        return self._slots.get(symbol)
+
+    def symbol(self, slot: int):
+        return self._symbols[slot]
+
+    def acquire(self, symbol: str, initial_price: float) -> int:
+        slot = self._slots.get(symbol)
+        if slot is not None:
+            return slot
+
+        traits = SymbolTraits(symbol, initial_price)
+        if self._free:
+            slot = heapq.heappop(self._free)
+            self._symbols[slot] = symbol
+            self.traits[slot] = traits
+        else:
+            slot = len(self._symbols)
+            self._symbols.append(symbol)
+            self.traits.append(traits)
+
+        self._slots[symbol] = slot
+        return slot
+
+    def release(self, symbol: str):
+        slot = self._slots.pop(symbol, None)
+        if slot is None:
+            return None
+        self._symbols[slot] = None
+        self.traits[slot] = None
+        heapq.heappush(self._free, slot)
+        return slot
+
+
+registry = SymbolRegistry()
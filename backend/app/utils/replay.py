@@ -0,0 +1,286 @@
+"""
+Recording and replay of market sessions.
+
+`SessionRecorder` is a tick listener. After every tick it appends one frame
+(price, volume, initial price and the synthetic book of every symbol) as a
+JSON line to the tape. It also appends the frame's (step, byte offset) to
+`<tape>.idx`. Recording to an existing tape continues it: torn trailing
+writes are cut off and step numbers carry on from the last frame.
+
+`ReplayDriver` plugs into the simulator loop in place of `live_tick`. It
+feeds recorded frames into the market at 1x, Nx or max speed, and the step
+counter, telemetry and tick listeners behave exactly as they do live. User
+orders still match against the replayed liquidity, and symbols missing from
+the tape keep ticking live. Seeking uses the index, so it never scans the
+tape. Unless it loops, a replay that reaches the end of the tape hands over
+to the live simulator, which carries on from the last frame.
+"""
+import pathlib
+
+import numpy as np
+import orjson
+
+import app.sim_config as cfg
+from app.models.crypto import Crypto
+from app.utils.db import cryptos, lock
+from app.utils.history import PriceHistory
+from app.utils import simulator
+
+TAPE_FORMAT = "coinlabs-tape"
+TAPE_VERSION = 1
+
+_INDEX_DTYPE = np.dtype([("step", "<i8"), ("offset", "<i8")])
+
+
+def _index_path(path):
+    return pathlib.Path(str(path) + ".idx")
+
+
+class SessionRecorder:
+    FLUSH_EVERY = 64
+
+    def __init__(self, path):
+        path = pathlib.Path(path)
+        fresh = not path.exists() or path.stat().st_size == 0
+        self._offset = 0  # last step already on the tape
+        if not fresh:
+            tape = SessionTape(path)
+            if len(tape):
+                self._offset = int(tape.steps[-1])
+            index, end = tape.index, tape.end
+            tape.close()
+            with open(path, "r+b") as f:
+                f.truncate(end)
+            _index_path(path).write_bytes(index.tobytes())
+        self._data = open(path, "ab")
+        self._index = open(_index_path(path), "ab")
+        if fresh:
+            self._data.write(orjson.dumps({
+                "format": TAPE_FORMAT,
+                "version": TAPE_VERSION,
+                "tick_speed": cfg.TICK_SPEED,
+            }) + b"\n")
+        self._pending = 0
+
+    def __call__(self, step):
+        step += self._offset
+        frame = {
+            "step": step,
+            "cryptos": {
+                symbol: [r.price, r.volume, r.initial_price, *_book_levels(r.book)]
+                for symbol, r in cryptos.items()
+            },
+        }
+        offset = self._data.tell()
+        self._data.write(orjson.dumps(frame) + b"\n")
+        self._index.write(np.array([(step, offset)], dtype=_INDEX_DTYPE).tobytes())
+
+        self._pending += 1
+        if self._pending >= self.FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        self._data.flush()
+        self._index.flush()
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+        self._data.close()
+        self._index.close()
+
+
+def _book_levels(book):
+    synthetic = book.synthetic_book or {"bids": [], "asks": []}
+    return synthetic["bids"], synthetic["asks"]
+
+
+class SessionTape:
+    """Read-only view of a recorded tape with step -> frame lookup."""
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self._f = open(self.path, "rb")
+        header = orjson.loads(self._f.readline())
+        if header.get("format") != TAPE_FORMAT:
+            raise ValueError(f"{path} is not a {TAPE_FORMAT} file")
+        self.tick_speed = header.get("tick_speed", cfg.TICK_SPEED)
+        self._body = self._f.tell()
+
+        self.end = self._body  # byte offset just past the last usable frame
+        self.index = self._load_index()
+        self.steps = self.index["step"]
+        self.offsets = self.index["offset"]
+
+    def _load_index(self):
+        index = np.empty(0, dtype=_INDEX_DTYPE)
+        idx_path = _index_path(self.path)
+        if idx_path.exists():
+            index = np.fromfile(idx_path, dtype=_INDEX_DTYPE)
+            # keep the prefix that is in order and inside the tape
+            size = self.path.stat().st_size
+            offsets, steps = index["offset"], index["step"]
+            ok = (offsets >= self._body) & (offsets < size)
+            ok[1:] &= (np.diff(offsets) > 0) & (np.diff(steps) > 0)
+            bad = np.flatnonzero(~ok)
+            if len(bad):
+                index = index[:bad[0]]
+        # the last indexed frame may be torn, and later frames may be unindexed
+        if len(index):
+            start, index = int(index["offset"][-1]), index[:-1]
+            last_step = int(index["step"][-1]) if len(index) else None
+        else:
+            start, last_step = self._body, None
+        return np.concatenate((index, self._scan_index(start, last_step)))
+
+    def _scan_index(self, offset, last_step=None):
+        """Index frames from `offset` up to the first torn or out-of-order one."""
+        rows = []
+        self._f.seek(offset)
+        for line in self._f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                step = orjson.loads(line)["step"]
+            except (orjson.JSONDecodeError, KeyError, TypeError):
+                break
+            if last_step is not None and step <= last_step:
+                break
+            rows.append((step, offset))
+            offset += len(line)
+            last_step = step
+        self.end = offset
+        return np.array(rows, dtype=_INDEX_DTYPE)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def position_of(self, step):
+        """Index of the first frame at or after `step`."""
+        return int(np.searchsorted(self.steps, step, side="left"))
+
+    def frames(self, start, stop=None):
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return
+        self._f.seek(int(self.offsets[start]))
+        for _ in range(start, stop):
+            yield orjson.loads(self._f.readline())
+
+    def close(self):
+        self._f.close()
+
+
+class ReplayDriver:
+    def __init__(self, tape: SessionTape, loop=False):
+        self.tape = tape
+        self.loop = loop
+        self._pos = 0
+        self._frames = None
+
+    def seek(self, step):
+        """Jump to the frame for `step` and rebuild price history from the
+        frames before it. Takes the market lock."""
+        with lock:
+            tape = self.tape
+            i = min(tape.position_of(step), len(tape) - 1)
+            if i < 0:
+                return
+            lo = max(0, i - cfg.HISTORY_LIMIT + 1)
+
+            prices = {}
+            frame = None
+            for frame in tape.frames(lo, i + 1):
+                for symbol, row in frame["cryptos"].items():
+                    prices.setdefault(symbol, []).append(row[0])
+
+            self._apply(frame)
+            for symbol, history in prices.items():
+                if symbol in cryptos:
+                    cryptos[symbol].history = PriceHistory(history)
+            simulator.set_step(frame["step"])
+
+            self._pos = i + 1
+            self._frames = None
+
+    def tick(self, step):
+        if self._frames is None:
+            self._frames = self.tape.frames(self._pos)
+
+        frame = next(self._frames, None)
+        if frame is None:
+            if not self.loop or not len(self.tape):
+                # the simulator loop takes over live from the last frame
+                if _recorder is None:
+                    simulator.set_adaptive(cfg.config.SIM_ADAPTIVE_TICKS)
+                return False
+            self.seek(int(self.tape.steps[0]))
+            return None
+
+        self._pos += 1
+        self._apply(frame, append=True)
+
+        # symbols listed since the recording keep moving on the live model
+        recorded = frame["cryptos"]
+        others = [r for symbol, r in cryptos.items() if symbol not in recorded]
+        if others:
+            simulator.live_tick(step, others)
+
+        # the loop increments after the tick, landing on the recorded step
+        simulator.set_step(frame["step"] - 1)
+
+    def _apply(self, frame, append=False):
+        from app.services.market import market_add_crypto
+
+        for symbol, (price, volume, initial_price, bids, asks) in frame["cryptos"].items():
+            r = cryptos.get(symbol)
+            if r is None:
+                market_add_crypto(Crypto(symbol=symbol, price=initial_price, volume=volume))
+                r = cryptos[symbol]
+            r.price = price
+            r.volume = volume
+            r.initial_price = initial_price
+            if append:
+                r.history.append(price)
+            r.book.replace_synthetic({"bids": bids, "asks": asks})
+            r.book.match()
+
+
+_recorder = None
+
+
+def start_recording(path):
+    global _recorder
+    if _recorder is None:
+        # every frame holds every symbol, so none may lag behind
+        simulator.set_adaptive(False)
+        _recorder = SessionRecorder(path)
+        simulator.add_tick_listener(_recorder)
+    return _recorder
+
+
+def stop_recording():
+    global _recorder
+    if _recorder is not None:
+        simulator.remove_tick_listener(_recorder)
+        with lock:
+            _recorder.close()
+        _recorder = None
+        simulator.set_adaptive(cfg.config.SIM_ADAPTIVE_TICKS)
+
+
+def start_replay(path, speed="1", start_step=0, loop=False):
+    """Start the simulator thread on a recorded tape. `speed` is a multiple
+    of the recorded tick rate, or "max" to replay as fast as consumers allow."""
+    simulator.set_adaptive(False)
+    driver = ReplayDriver(SessionTape(path), loop=loop)
+    if start_step:
+        driver.seek(start_step)
+
+    if str(speed).lower() == "max":
+        interval = 0.0
+    else:
+        interval = driver.tape.tick_speed / max(float(speed), 1e-9)
+
+    simulator.start_simulation(tick=driver.tick, interval=interval)
+    return driver
@@ -0,0 +1,171 @@
+"""
+Seeded random streams for the simulator.
+
+Every symbol gets its own family of PCG64 generators, derived from the
+global seed and the symbol name through `SeedSequence`, plus one family for
+the market-wide factor. A symbol's path therefore depends only on the seed
+and its own name, so listing or delisting another coin can't change it,
+and the same seed replays the same market bit for bit.
+
+Each kind of shock (t innovations, sentiment, fundamental, jumps, book
+sizes) has its own generator, created on its first draw so symbols that
+never tick cost next to nothing. Variates are pre-drawn in small blocks.
+Once a symbol has used up a block, the next one is filled on a background
+thread while the current one is being consumed. Every generator is only
+ever drawn from sequentially, so neither block size nor prefetching changes
+the sequence.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import app.sim_config as cfg
+
+BLOCK_TICKS = 32
+
+_T_SCALE = 1.0 / np.sqrt(cfg.DF_T / (cfg.DF_T - 2.0))
+
+
+def _t(g, n):
+    return g.standard_t(cfg.DF_T, n) * _T_SCALE
+
+
+def _normal(g, n):
+    return g.standard_normal(n)
+
+
+def _uniform(g, n):
+    return g.random(n)
+
+
+# kind -> (draw(generator, n), block size)
+SYMBOL_KINDS = {
+    "eps": (_t, BLOCK_TICKS),
+    "senti": (_normal, BLOCK_TICKS),
+    "fund": (_normal, BLOCK_TICKS),
+    "jump_u": (_uniform, BLOCK_TICKS),
+    "jump_n": (_normal, 16),
+    "book": (_normal, BLOCK_TICKS * 2 * cfg.ORDER_BOOK_DEPTH),
+}
+MARKET_KINDS = {
+    "eps": (_t, BLOCK_TICKS),
+    "senti": (_normal, BLOCK_TICKS),
+}
+
+_MARKET_KEY = 0
+_SYMBOL_KEY = 1
+
+_refill_pool = None
+_pool_lock = threading.Lock()
+
+
+def _pool():
+    global _refill_pool
+    if _refill_pool is None:
+        with _pool_lock:
+            if _refill_pool is None:
+                _refill_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rng-refill")
+    return _refill_pool
+
+
+class _Block:
+    """Sequential reader over one generator. The next block is prefetched
+    once the first one has been used up."""
+    __slots__ = ("_gen", "_draw", "_size", "_buf", "_pos", "_next")
+
+    def __init__(self, gen, draw, size):
+        self._gen = gen
+        self._draw = draw
+        self._size = size
+        self._buf = draw(gen, size)
+        self._pos = 0
+        self._next = None
+
+    def _advance(self):
+        if self._next is None:
+            self._buf = self._draw(self._gen, self._size)
+        else:
+            self._buf = self._next.result()
+        self._pos = 0
+        self._next = _pool().submit(self._draw, self._gen, self._size)
+
+    def take(self):
+        if self._pos == self._size:
+            self._advance()
+        v = self._buf[self._pos]
+        self._pos += 1
+        return float(v)
+
+    def take_n(self, n):
+        """Next `n` variates as a float64 array."""
+        if self._pos + n <= self._size:
+            out = self._buf[self._pos:self._pos + n]
+            self._pos += n
+            return out
+        parts = []
+        while n:
+            if self._pos == self._size:
+                self._advance()
+            chunk = self._buf[self._pos:self._pos + n]
+            self._pos += len(chunk)
+            n -= len(chunk)
+            parts.append(chunk)
+        return np.concatenate(parts)
+
+
+class ShockStream:
+    """Independent pre-drawn shock streams for one symbol (or the market)."""
+    __slots__ = ("_seq", "_kinds", "_blocks")
+
+    def __init__(self, seed_seq: np.random.SeedSequence, kinds):
+        self._seq = seed_seq
+        self._kinds = kinds
+        self._blocks = {}
+
+    def _open(self, kind):
+        # the i-th kind's child, as seed_seq.spawn() would have made it
+        i = list(self._kinds).index(kind)
+        child = np.random.SeedSequence(self._seq.entropy, spawn_key=self._seq.spawn_key + (i,))
+        draw, size = self._kinds[kind]
+        block = self._blocks[kind] = _Block(np.random.Generator(np.random.PCG64(child)), draw, size)
+        return block
+
+    def take(self, kind):
+        block = self._blocks.get(kind) or self._open(kind)
+        return block.take()
+
+    def take_n(self, kind, n):
+        block = self._blocks.get(kind) or self._open(kind)
+        return block.take_n(n)
+
+
+_root_entropy = None
+
+
+def root_entropy():
+    """Entropy every stream is derived from: the configured SIM_SEED, or a
+    fresh value (logged so the run can be reproduced) when unset."""
+    global _root_entropy
+    if _root_entropy is None:
+        if cfg.config.SIM_SEED is not None:
+            _root_entropy = cfg.config.SIM_SEED
+        else:
+            _root_entropy = np.random.SeedSequence().entropy
+            logging.getLogger(cfg.config.LOGGER).info("simulator seed: %d", _root_entropy)
+    return _root_entropy
+
+
+def _symbol_key(symbol: str) -> int:
+    return int.from_bytes(symbol.encode(), "little")
+
+
+def symbol_stream(symbol: str) -> ShockStream:
+    seq = np.random.SeedSequence(root_entropy(), spawn_key=(_SYMBOL_KEY, _symbol_key(symbol)))
+    return ShockStream(seq, SYMBOL_KINDS)
+
+
+def market_stream() -> ShockStream:
+    seq = np.random.SeedSequence(root_entropy(), spawn_key=(_MARKET_KEY,))
+    return ShockStream(seq, MARKET_KINDS)
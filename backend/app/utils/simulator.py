@@ -1,57 +1,101 @@
-import random
+import math
 import numpy as np
 import time
 import threading
-from app.utils.db import cryptos
+from collections import deque
+from app.utils.db import cryptos, lock
+from app.utils.registry import (
+    registry,
+    tick_index,
+    TICK_SIZES,
+    TICK_LOWER,
+    TICK_UPPER,
+)
+from app.utils.orderbook import BUY, SELL
+from app.utils import rng as rng_streams
 import app.sim_config as cfg
 
 running = True
-_state = {}
+_state = []  # per-symbol state, indexed by registry slot
 _market_sentiment = 0.0
+_market_rng = None
 _step = 0
 
-def _t_noise(df=cfg.DF_T, size=None):
-    z = np.random.standard_t(df, size=size)
-
-    return z / np.sqrt(df / (df - 2.0))
+def _market():
+    global _market_rng
+    if _market_rng is None:
+        _market_rng = rng_streams.market_stream()
+    return _market_rng
 
 def _tick_size_for_price(p):
-    if p < 1:       return 0.0001
-    if p < 10:      return 0.001
-    if p < 100:     return 0.01
-    if p < 1000:    return 0.1
-    if p < 20000:   return 1.0
-    return 5.0
+    return TICK_SIZES[tick_index(p)]
 
 def _round_tick(x, tick):
     return np.round(x / tick) * tick
 
-def _is_stablecoin(symbol: str):
-    return any(k in symbol.upper() for k in cfg.STABLECOIN_TOKENS)
+def round_to_tick(price):
+    """Snap a price onto the tick grid the synthetic book is quoted on."""
+    return float(_round_tick(price, _tick_size_for_price(price)))
 
 def _intraday_seasonality(step):
     period = int((24 * 60 * 60) / cfg.TICK_SPEED)
     if period <= 0:
         return 1.0
     
-    phase = 2 * np.pi * (step % period) / period
-    return 1.0 + cfg.SEASONAL_AMP * np.sin(phase)
-
-def _ensure_state(symbol, price0):
-    if symbol in _state:
-        return _state[symbol]
-    st = {
-        "sigma2": cfg.SIGMA0**2,
-        "last_r": 0.0,
-        "fund_log": np.log(max(price0, 1e-8)),
-        "last_bid_vol": 0.0,
-        "last_ask_vol": 0.0,
-        "sentiment": 0.0,
-    }
-    _state[symbol] = st
+    phase = 2 * math.pi * (step % period) / period
+    return 1.0 + cfg.SEASONAL_AMP * math.sin(phase)
+
+class _SymbolState:
+    __slots__ = (
+        "sigma2", "last_r", "fund_log", "last_bid_vol", "last_ask_vol", "sentiment", "rng",
+        "sim_step", "last_read", "pins", "cold",
+    )
+
+    def __init__(self, price0, symbol):
+        self.rng = rng_streams.symbol_stream(symbol)
+        self.sigma2 = cfg.SIGMA0**2
+        self.last_r = 0.0
+        self.fund_log = float(np.log(max(price0, 1e-8)))
+        self.last_bid_vol = 0.0
+        self.last_ask_vol = 0.0
+        self.sentiment = 0.0
+        self.sim_step = _step  # next step this symbol has to simulate
+        self.last_read = _step
+        self.pins = 0  # subscriptions / alerts keeping the symbol hot
+        self.cold = False
+
+def _ensure_state(slot, price0):
+    if slot >= len(_state):
+        _state.extend([None] * (slot + 1 - len(_state)))
+    st = _state[slot]
+    if st is None:
+        st = _state[slot] = _SymbolState(price0, registry.symbol(slot))
     return st
 
-def create_order_book(price, sigma=None, depth=None):
+def release_state(slot):
+    """Drop the state of a freed registry slot so its next owner starts clean."""
+    if slot is not None and slot < len(_state):
+        _state[slot] = None
+        _active.pop(slot, None)
+
+_book_rng = None
+
+def _book_sizes(sigma, z, depth):
+    """Bid then ask level sizes: lognormal(log(base_size), 0.35), decaying
+    away from the touch."""
+    base_size = 1.5 / max(1.0, sigma * 200.0)
+    decay = np.exp(-cfg.DEPTH_DECAY * np.arange(depth))
+    return np.maximum(0.05, base_size * np.exp(0.35 * z) * np.tile(decay, 2))
+
+def create_order_book(price, sigma=None, depth=None, rng=None):
+    """Synthetic liquidity around `price`. Level sizes are drawn from the
+    symbol's `rng` stream (a shared fallback stream when not given)."""
+    global _book_rng
+    if rng is None:
+        if _book_rng is None:
+            _book_rng = rng_streams.symbol_stream("")
+        rng = _book_rng
+
     if sigma is None:
         sigma = cfg.SIGMA0
 
@@ -68,117 +112,360 @@ def create_order_book(price, sigma=None, depth=None):
     best_ask = _round_tick(mid + base_spread / 2.0, tick)
     level_gap = max(tick, cfg.LEVEL_SPACING_FACTOR * base_spread / max(depth, 1))
 
-    bids, asks = [], []
-    base_size = 1.5 / max(1.0, sigma * 200.0)
-
-    for i in range(depth):
-        b_px = _round_tick(best_bid - i * level_gap, tick)
-        a_px = _round_tick(best_ask + i * level_gap, tick)
+    levels = np.arange(depth)
+    b_px = _round_tick(best_bid - levels * level_gap, tick)
+    a_px = _round_tick(best_ask + levels * level_gap, tick)
 
-        decay = np.exp(-cfg.DEPTH_DECAY * i)
+    sizes = _book_sizes(sigma, rng.take_n("book", 2 * depth), depth)
 
-        b_sz = max(0.05, np.random.lognormal(mean=np.log(base_size), sigma=0.35) * decay)
-        a_sz = max(0.05, np.random.lognormal(mean=np.log(base_size), sigma=0.35) * decay)
-
-        bids.append((float(b_px), float(b_sz)))
-        asks.append((float(a_px), float(a_sz)))
+    bids = list(zip(b_px.tolist(), sizes[:depth].tolist()))
+    asks = list(zip(a_px.tolist(), sizes[depth:].tolist()))
 
     return {"bids": bids, "asks": asks}
 
-def _microprice(order_book):
+def init_book(crypto):
+    """Seed a newly listed symbol's book from its own random stream."""
+    st = _ensure_state(crypto.slot, crypto.initial_price)
+    crypto.book.replace_synthetic(create_order_book(crypto.price, rng=st.rng))
+    _active[crypto.slot] = crypto
 
-    if not order_book["bids"] or not order_book["asks"]:
+def _microprice(book):
+    bb, ba = book.best_bid(), book.best_ask()
+    if bb is None or ba is None:
         return None
-    
-    bb, vb = order_book["bids"][0]
-    ba, va = order_book["asks"][0]
+
+    vb = book.level_qty(BUY, bb)
+    va = book.level_qty(SELL, ba)
     denom = (vb + va) or 1.0
 
     return (ba * vb + bb * va) / denom
 
-def simulate_tick(crypto, symbol=None, common_eps=None, seasonality=None):
-    global _market_sentiment
-
-    if symbol is None:
-        symbol = getattr(crypto, "symbol", None) or "UNKNOWN"
-
-    st = _ensure_state(symbol, crypto.initial_price)
-    seasonality = 1.0 if seasonality is None else seasonality
-    eps_idio = _t_noise()
-
+def _mix_eps(common_eps, eps_idio):
     if common_eps is None:
-        eps = eps_idio
-    else:
-        rho = max(0.0, min(1.0, cfg.COMMON_RHO))
-        eps = np.sqrt(rho) * common_eps + np.sqrt(max(0.0, 1.0 - rho)) * eps_idio
-    ob = getattr(crypto, "order_book", None)
-
-    if not ob or not isinstance(ob, dict) or "bids" not in ob or "asks" not in ob:
-        ob = create_order_book(crypto.price, sigma=np.sqrt(st["sigma2"]) * seasonality)
-        crypto.order_book = ob
-
-    bid_vol = float(sum(v for _, v in ob["bids"]))
-    ask_vol = float(sum(v for _, v in ob["asks"]))
-    ofi = (bid_vol - ask_vol) / max(bid_vol + ask_vol, 1.0)
-
-    _market_sentiment = cfg.MARKET_SENTI_PERSIST * _market_sentiment + np.random.normal(0.0, cfg.MARKET_SENTI_SHOCK)
-    _market_sentiment = float(np.clip(_market_sentiment, -cfg.SENTI_CLIP, cfg.SENTI_CLIP))
-
-    st["sentiment"] = cfg.SENTI_PERSIST * st["sentiment"] + np.random.normal(0.0, cfg.SENTI_SHOCK)
-    st["sentiment"] = float(np.clip(st["sentiment"], -cfg.SENTI_CLIP, cfg.SENTI_CLIP))
-    st["fund_log"] += cfg.FUND_DRIFT * cfg.TICK_SPEED + np.random.normal(0.0, cfg.FUND_VOL * np.sqrt(cfg.TICK_SPEED))
-
-    log_p = np.log(max(crypto.price, 1e-12))
-    mean_rev = cfg.THETA_F * (st["fund_log"] - log_p) * cfg.TICK_SPEED
-    vol_scale = np.sqrt(st["sigma2"]) * np.sqrt(cfg.TICK_SPEED) * seasonality
-
-    jump = 0.0
-    if np.random.rand() < cfg.JUMP_LAMBDA:
-        jump = np.random.normal(cfg.JUMP_MU, cfg.JUMP_SIGMA)
-
-    drift = cfg.MU * cfg.TICK_SPEED + st["sentiment"] + _market_sentiment + cfg.OFI_IMPACT * ofi
+        return eps_idio
+    rho = max(0.0, min(1.0, cfg.COMMON_RHO))
+    return math.sqrt(rho) * common_eps + math.sqrt(max(0.0, 1.0 - rho)) * eps_idio
+
+def _move(crypto, st, traits, eps, ofi, senti_z, fund_z, jump, market_sentiment, seasonality):
+    """One step of the price model from pre-drawn shocks. Shared by the live
+    tick and cold-symbol catch-up so both produce the same path. Scalar math
+    only: this runs once per symbol per step."""
+    sentiment = cfg.SENTI_PERSIST * st.sentiment + cfg.SENTI_SHOCK * senti_z
+    st.sentiment = sentiment = min(max(sentiment, -cfg.SENTI_CLIP), cfg.SENTI_CLIP)
+    st.fund_log += cfg.FUND_DRIFT * cfg.TICK_SPEED + cfg.FUND_VOL * math.sqrt(cfg.TICK_SPEED) * fund_z
+
+    log_p = math.log(max(crypto.price, 1e-12))
+    mean_rev = cfg.THETA_F * (st.fund_log - log_p) * cfg.TICK_SPEED
+    vol_scale = math.sqrt(st.sigma2) * math.sqrt(cfg.TICK_SPEED) * seasonality
+
+    drift = cfg.MU * cfg.TICK_SPEED + sentiment + market_sentiment + cfg.OFI_IMPACT * ofi
     r = drift + mean_rev + vol_scale * eps + jump
 
     new_log_p = log_p + r
-    new_price = float(np.exp(new_log_p))
+    new_price = math.exp(new_log_p)
 
-    if _is_stablecoin(symbol):
-        new_price = float(np.clip(new_price, crypto.initial_price * 0.997, crypto.initial_price * 1.003))
+    if traits.stable:
+        new_price = min(max(new_price, traits.band_lo), traits.band_hi)
 
-    tick = _tick_size_for_price(new_price)
+    # most ticks stay inside the cached price band, skip the lookup then
+    idx = traits.tick_idx
+    if not (TICK_LOWER[idx] <= new_price < TICK_UPPER[idx]):
+        idx = traits.tick_idx = tick_index(new_price)
+    tick = TICK_SIZES[idx]
 
-    new_price = float(_round_tick(new_price, tick))
+    # round() is half-to-even like np.round
+    new_price = round(new_price / tick) * tick
     new_price = max(tick, new_price)
 
     crypto.price = new_price
     crypto.volume += abs(r) * max(1.0, new_price)
-    crypto.history.append(new_price)
-
-    if len(crypto.history) > cfg.HISTORY_LIMIT:
-        crypto.history.pop(0)
 
-    sigma_next = cfg.GARCH_W + cfg.GARCH_A * (r ** 2) + cfg.GARCH_B * st["sigma2"]
+    sigma_next = cfg.GARCH_W + cfg.GARCH_A * (r ** 2) + cfg.GARCH_B * st.sigma2
 
-    if _is_stablecoin(symbol):
+    if traits.stable:
         sigma_next *= 0.25
 
-    st["sigma2"] = float(max(1e-12, sigma_next))
-    crypto.order_book = create_order_book(new_price, sigma=np.sqrt(st["sigma2"]) * seasonality)
+    st.sigma2 = max(1e-12, sigma_next)
+    st.last_r = r
+    return new_price
 
-    st["last_r"] = r
-    st["last_bid_vol"] = bid_vol
-    st["last_ask_vol"] = ask_vol
+def _ofi(bid_vol, ask_vol):
+    return (bid_vol - ask_vol) / max(bid_vol + ask_vol, 1.0)
 
-def simulation_loop():
-    global _step
+def simulate_tick(crypto, common_eps=None, seasonality=None, market_sentiment=None):
+    slot = crypto.slot
+    st = _ensure_state(slot, crypto.initial_price)
+    traits = registry.traits[slot]
+    rng = st.rng
+    seasonality = 1.0 if seasonality is None else seasonality
+    market_sentiment = _market_sentiment if market_sentiment is None else market_sentiment
+    eps = _mix_eps(common_eps, rng.take("eps"))
+    book = crypto.book
+
+    if not book.has_synthetic:
+        book.replace_synthetic(create_order_book(crypto.price, sigma=math.sqrt(st.sigma2) * seasonality, rng=rng))
+
+    # user orders resting near the touch count towards order flow imbalance
+    bid_vol, ask_vol = book.depth_volume(cfg.ORDER_BOOK_DEPTH)
+
+    jump = 0.0
+    if rng.take("jump_u") < cfg.JUMP_LAMBDA:
+        jump = cfg.JUMP_MU + cfg.JUMP_SIGMA * rng.take("jump_n")
+
+    new_price = _move(
+        crypto, st, traits, eps, _ofi(bid_vol, ask_vol),
+        rng.take("senti"), rng.take("fund"), jump, market_sentiment, seasonality,
+    )
+    # history is bounded, so the oldest price drops off on its own
+    crypto.history.append(new_price)
+
+    book.replace_synthetic(create_order_book(new_price, sigma=math.sqrt(st.sigma2) * seasonality, rng=rng))
+    book.match()
+
+    st.last_bid_vol = bid_vol
+    st.last_ask_vol = ask_vol
+
+def _catch_up(crypto, st, step):
+    """Simulate the steps a cold symbol skipped, up to (not including) `step`,
+    from the recorded market factors. The symbol's shocks come from its own
+    streams in bulk. Between skipped steps only the book's level sizes are
+    needed (for order flow imbalance), so the book itself is rebuilt once,
+    for the last step. The result matches ticking the symbol every step."""
+    start = st.sim_step
+    k = step - start
+    if k <= 0:
+        return
+    depth = cfg.ORDER_BOOK_DEPTH
+    traits = registry.traits[crypto.slot]
+    rng = st.rng
+    factors = _factors[np.arange(start, step) % cfg.CATCHUP_WINDOW]
+    common_eps, market_sentiment, seasonality = factors[:, 0], factors[:, 1], factors[:, 2]
+
+    eps = _mix_eps(common_eps, rng.take_n("eps", k))
+    jumps = np.zeros(k)
+    hits = rng.take_n("jump_u", k) < cfg.JUMP_LAMBDA
+    if hits.any():
+        jumps[hits] = cfg.JUMP_MU + cfg.JUMP_SIGMA * rng.take_n("jump_n", int(hits.sum()))
+    senti = rng.take_n("senti", k).tolist()
+    fund = rng.take_n("fund", k).tolist()
+    # same elementwise exp as create_order_book, for every skipped book at once
+    book_e = np.exp(0.35 * rng.take_n("book", 2 * depth * (k - 1))).reshape(k - 1, 2 * depth).tolist()
+    decay = np.tile(np.exp(-cfg.DEPTH_DECAY * np.arange(depth)), 2).tolist()
+    eps, jumps = eps.tolist(), jumps.tolist()
+    market_sentiment, seasonality = market_sentiment.tolist(), seasonality.tolist()
+
+    # a cold symbol has no user orders, so its book is only synthetic levels
+    bid_vol, ask_vol = crypto.book.depth_volume(depth)
+    prices = []
+    for j in range(k):
+        prices.append(_move(
+            crypto, st, traits, eps[j], _ofi(bid_vol, ask_vol),
+            senti[j], fund[j], jumps[j], market_sentiment[j], seasonality[j],
+        ))
+        if j < k - 1:
+            # _book_sizes, level by level
+            base_size = 1.5 / max(1.0, math.sqrt(st.sigma2) * seasonality[j] * 200.0)
+            sizes = [max(0.05, base_size * e * d) for e, d in zip(book_e[j], decay)]
+            bid_vol, ask_vol = float(sum(sizes[:depth])), float(sum(sizes[depth:]))
+    crypto.history.extend(prices)
+
+    crypto.book.replace_synthetic(
+        create_order_book(crypto.price, sigma=math.sqrt(st.sigma2) * seasonality[-1], rng=rng)
+    )
+    crypto.book.match()
+
+    st.last_bid_vol = bid_vol
+    st.last_ask_vol = ask_vol
+    st.sim_step = step
+
+def _advance_market():
+    """Draw this step's market factor and move market-wide sentiment, once
+    per step no matter how many symbols are listed."""
+    global _market_sentiment
+    market = _market()
+    _market_sentiment = cfg.MARKET_SENTI_PERSIST * _market_sentiment + cfg.MARKET_SENTI_SHOCK * market.take("senti")
+    _market_sentiment = min(max(_market_sentiment, -cfg.SENTI_CLIP), cfg.SENTI_CLIP)
+    return market.take("eps")
+
+def _catch_up_all():
+    for crypto in cryptos.values():
+        _catch_up(crypto, _state[crypto.slot], _step)
+
+# Adaptive cadence: only hot symbols (recently read, pinned, or with resting
+# user orders) tick every step. Cold ones are skipped and caught up exactly:
+# when next read, and in the background a few per tick, so that each is
+# visited about every CATCHUP_BATCH steps and never lags far behind.
+_adaptive = cfg.config.SIM_ADAPTIVE_TICKS
+_active = {}  # slot -> record ticked every step
+_cold = deque()  # slots of cold symbols, in catch-up order
+_factors = np.zeros((cfg.CATCHUP_WINDOW, 3))  # (common eps, market sentiment, seasonality) by step
+
+def _is_hot(crypto, st, step):
+    return st.pins > 0 or crypto.book.user_orders > 0 or step - st.last_read <= cfg.COLD_AFTER_STEPS
+
+def _cool(slot, st):
+    del _active[slot]
+    st.cold = True
+    _cold.append(slot)
+
+def _warm(crypto, st):
+    st.cold = False
+    _active[crypto.slot] = crypto
+
+def _advance_cold(step):
+    """Catch up the cold symbols at the front of the queue to `step`. Taking
+    1/CATCHUP_BATCH of the queue each tick spreads the work evenly."""
+    for _ in range(-(-len(_cold) // cfg.CATCHUP_BATCH)):
+        slot = _cold.popleft()
+        st = _state[slot] if slot < len(_state) else None
+        if st is None or not st.cold:
+            continue  # warmed up or delisted since
+        _catch_up(cryptos[registry.symbol(slot)], st, step + 1)
+        _cold.append(slot)
+
+def catch_up(crypto):
+    """Bring `crypto` up to the current step without marking it hot (lists
+    and exports read everything). Call with the market lock held."""
+    if _adaptive:
+        _catch_up(crypto, _state[crypto.slot], _step)
+
+def touch(crypto):
+    """Note an API read of `crypto`: bring it up to date and keep it ticking
+    for the next COLD_AFTER_STEPS steps. Call with the market lock held."""
+    st = _state[crypto.slot]
+    st.last_read = _step
+    if _adaptive:
+        _catch_up(crypto, st, _step)
+        if st.cold:
+            _warm(crypto, st)
+
+def pin(crypto):
+    """Keep `crypto` ticking every step until a matching `unpin` (stream
+    subscriptions, alerts). Call with the market lock held."""
+    _state[crypto.slot].pins += 1
+    touch(crypto)
+
+def unpin(crypto):
+    st = _state[crypto.slot]
+    st.pins = max(0, st.pins - 1)
+
+def set_adaptive(enabled):
+    """Turn adaptive cadence on or off. Off ticks every symbol every step,
+    as recording and replay need."""
+    global _adaptive
+    with lock:
+        if _adaptive and not enabled:
+            _catch_up_all()
+        elif enabled and not _adaptive:
+            # every symbol ticked every step while this was off
+            _cold.clear()
+            for crypto in cryptos.values():
+                st = _state[crypto.slot]
+                st.sim_step = _step
+                _warm(crypto, st)
+        _adaptive = bool(enabled)
+
+def live_tick(step, records=None):
+    """Advance every listed symbol (or just `records`) by one simulated tick."""
+    seasonality = _intraday_seasonality(step)
+    common_eps = _advance_market()
+    _factors[step % cfg.CATCHUP_WINDOW] = (common_eps, _market_sentiment, seasonality)
+
+    if records is not None or not _adaptive:
+        for crypto in (cryptos.values() if records is None else records):
+            simulate_tick(crypto, common_eps=common_eps, seasonality=seasonality)
+        return
+
+    for slot, crypto in list(_active.items()):
+        st = _state[slot]
+        if not _is_hot(crypto, st, step):
+            _cool(slot, st)
+            continue
+        simulate_tick(crypto, common_eps=common_eps, seasonality=seasonality)
+        st.sim_step = step + 1
+
+    _advance_cold(step)
+
+_listeners = []
+
+def add_tick_listener(fn):
+    """Register `fn(step)` to run after every tick, while the market lock is
+    still held. Listeners see the same calls whether ticks are live or replayed."""
+    if fn not in _listeners:
+        _listeners.append(fn)
+
+def remove_tick_listener(fn):
+    if fn in _listeners:
+        _listeners.remove(fn)
+
+def simulation_loop(tick=live_tick, interval=None):
+    """Drive `tick(step)` every `interval` seconds (TICK_SPEED by default).
+    A tick returning False has run out (a finished replay): the market goes
+    on with `live_tick` every TICK_SPEED from that same step."""
+    global _step, _interval, _last_tick_end, _last_tick_seconds
+    _interval = cfg.TICK_SPEED if interval is None else interval
     while running:
-        seasonality = _intraday_seasonality(_step)
-        common_eps = _t_noise()
-        for symbol, crypto in cryptos.items():
-            simulate_tick(crypto, symbol=symbol, common_eps=common_eps, seasonality=seasonality)
-        _step += 1
-        time.sleep(cfg.TICK_SPEED)
-
-def start_simulation():
-    thread = threading.Thread(target=simulation_loop, daemon=True)
-    thread.start()
+        started = time.perf_counter()
+        with lock:
+            if tick(_step) is False:
+                tick, _interval = live_tick, cfg.TICK_SPEED
+                tick(_step)
+            _step += 1
+            for fn in list(_listeners):
+                fn(_step)
+        _last_tick_end = time.perf_counter()
+        _last_tick_seconds = _last_tick_end - started
+        # wakes early when stop_simulation() is called
+        _stop.wait(_interval)
+
+def set_step(step):
+    """Move the step counter, e.g. when a replay seeks."""
+    global _step
+    _step = step
+
+def current_step():
+    return _step
+
+_interval = cfg.TICK_SPEED
+_last_tick_end = None
+_last_tick_seconds = 0.0
+
+def simulation_status():
+    """Tick telemetry: how long the last tick took and how far the next one
+    is overdue (`lag_seconds` > 0 means the loop is falling behind)."""
+    lag = 0.0
+    if _last_tick_end is not None:
+        lag = max(0.0, time.perf_counter() - _last_tick_end - _interval)
+    return {
+        "running": running and _thread is not None,
+        "step": _step,
+        "symbols": len(cryptos),
+        "active_symbols": len(_active) if _adaptive else len(cryptos),
+        "tick_speed": cfg.TICK_SPEED,
+        "last_tick_seconds": _last_tick_seconds,
+        "lag_seconds": lag,
+    }
+
+_thread = None
+_stop = threading.Event()
+
+def start_simulation(tick=live_tick, interval=None):
+    """Start the simulator thread (no-op if it is already running). `tick`
+    and `interval` let a replay driver stand in for the live market."""
+    global running, _thread
+    if _thread is not None and _thread.is_alive():
+        return _thread
+    running = True
+    _stop.clear()
+    _thread = threading.Thread(target=simulation_loop, args=(tick, interval), name="simulator", daemon=True)
+    _thread.start()
+    return _thread
+
+def stop_simulation(timeout=None):
+    """Ask the simulator thread to exit after the current tick and wait for it."""
+    global running, _thread
+    running = False
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout if timeout is not None else cfg.TICK_SPEED * 4)
+        _thread = None
@@ -0,0 +1,122 @@
+"""
+Load test the backend against a local Supabase stand-in.
+
+    cd backend
+    python -m loadtest --rps 200 --duration 30 --latency-ms 40
+
+By default this starts the Supabase stub, launches `uvicorn app.main:app`
+pointed at it, lists `--symbols` coins and runs the load. Pass `--target`
+to load an already running backend instead (it must use the stub, or a
+real project, as its SUPABASE_URL).
+"""
+import argparse
+import asyncio
+import os
+import pathlib
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from loadtest.generator import DEFAULT_MIX, LoadGenerator
+from loadtest.stub_supabase import create_stub_app
+
+BACKEND_DIR = pathlib.Path(__file__).resolve().parents[1]
+
+
+def _parse_mix(text):
+    if not text:
+        return DEFAULT_MIX
+    mix = {}
+    for part in text.split(","):
+        name, weight = part.split("=")
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"unknown op '{name}', expected one of {list(DEFAULT_MIX)}")
+        mix[name] = float(weight)
+    return mix
+
+
+def _start_stub(port, latency_ms, jitter_ms):
+    server = uvicorn.Server(uvicorn.Config(
+        create_stub_app(latency_ms, jitter_ms), host="127.0.0.1", port=port, log_level="warning",
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def _start_backend(port, stub_url):
+    env = dict(os.environ, SUPABASE_URL=stub_url, SUPABASE_SERVICE_ROLE_KEY="loadtest")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+
+
+def _wait_ready(base_url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/market/status").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"backend at {base_url} did not become ready")
+
+
+def _seed_symbols(base_url, n):
+    symbols = [f"LT{i}" for i in range(n)]
+    with httpx.Client(base_url=base_url) as client:
+        for i, symbol in enumerate(symbols):
+            client.post("/market/add_new", json={"symbol": symbol, "price": 1.0 + 37.0 * i, "volume": 0})
+    return symbols
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rps", type=float, default=100.0)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--mix", help="e.g. market_get=5,portfolio_poll=5")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="stub Supabase latency")
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--max-inflight", type=int, default=1000)
+    parser.add_argument("--target", help="base URL of a running backend, e.g. http://localhost:8000")
+    parser.add_argument("--prefix", default="/crypto", help="router prefix the API is mounted under")
+    parser.add_argument("--stub-port", type=int, default=8791)
+    parser.add_argument("--backend-port", type=int, default=8790)
+    args = parser.parse_args(argv)
+
+    stub = backend = None
+    if args.target:
+        base_url = args.target.rstrip("/") + args.prefix
+    else:
+        stub = _start_stub(args.stub_port, args.latency_ms, args.jitter_ms)
+        backend = _start_backend(args.backend_port, f"http://127.0.0.1:{args.stub_port}")
+        base_url = f"http://127.0.0.1:{args.backend_port}{args.prefix}"
+
+    try:
+        _wait_ready(base_url)
+        symbols = _seed_symbols(base_url, args.symbols)
+        generator = LoadGenerator(
+            base_url, symbols, users=args.users, mix=_parse_mix(args.mix), max_inflight=args.max_inflight,
+        )
+        report = asyncio.run(generator.run(args.rps, args.duration))
+        print(report.format())
+    finally:
+        if backend is not None:
+            backend.terminate()
+            backend.wait(10)
+        if stub is not None:
+            stub.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
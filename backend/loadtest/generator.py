@@ -0,0 +1,171 @@
+"""
+Open-loop async load generator for the CoinLabs API.
+
+Requests are started on a Poisson schedule at the target rate regardless of
+how fast earlier ones finish, picking an operation from a weighted mix:
+
+- `market_list`      GET  /market/list
+- `market_get`       GET  /market/{symbol}
+- `portfolio_poll`   GET  /portfolio?user_id=...
+- `portfolio_write`  POST /portfolio/add, then DELETE /portfolio/delete
+
+While the load runs, `/market/status` is sampled so simulator tick time and
+lag can be reported next to request latency.
+"""
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+
+import httpx
+import numpy as np
+
+DEFAULT_MIX = {
+    "market_list": 0.15,
+    "market_get": 0.35,
+    "portfolio_poll": 0.40,
+    "portfolio_write": 0.10,
+}
+
+
+@dataclass
+class OpStats:
+    latencies: list = field(default_factory=list)
+    errors: int = 0
+
+    @property
+    def count(self):
+        return len(self.latencies)
+
+
+@dataclass
+class LoadReport:
+    duration: float
+    target_rps: float
+    ops: dict
+    shed: int = 0
+    tick_seconds: list = field(default_factory=list)
+    tick_lag: list = field(default_factory=list)
+    steps: tuple = (0, 0)
+    tick_speed: float = 0.0
+
+    def format(self) -> str:
+        lines = [
+            f"target {self.target_rps:.0f} rps for {self.duration:.1f}s, shed {self.shed}",
+            f"{'op':<16}{'count':>8}{'rps':>9}{'p50ms':>9}{'p90ms':>9}{'p99ms':>9}{'maxms':>9}{'err%':>8}",
+        ]
+        for name, st in self.ops.items():
+            if not st.count:
+                continue
+            lat = np.asarray(st.latencies) * 1000.0
+            p50, p90, p99 = np.percentile(lat, [50, 90, 99])
+            lines.append(
+                f"{name:<16}{st.count:>8}{st.count / self.duration:>9.1f}"
+                f"{p50:>9.1f}{p90:>9.1f}{p99:>9.1f}{lat.max():>9.1f}"
+                f"{100.0 * st.errors / st.count:>8.2f}"
+            )
+
+        if self.tick_seconds:
+            ticks = np.asarray(self.tick_seconds) * 1000.0
+            lag = np.asarray(self.tick_lag) * 1000.0
+            nominal = self.duration / self.tick_speed if self.tick_speed else 0.0
+            done = self.steps[1] - self.steps[0]
+            lines.append(
+                f"simulator: {done} ticks ({nominal:.0f} nominal), "
+                f"tick p50 {np.percentile(ticks, 50):.2f}ms p99 {np.percentile(ticks, 99):.2f}ms, "
+                f"lag p99 {np.percentile(lag, 99):.1f}ms max {lag.max():.1f}ms"
+            )
+        return "\n".join(lines)
+
+
+class LoadGenerator:
+    def __init__(self, base_url: str, symbols, users: int = 50, mix=None, max_inflight: int = 1000):
+        self.base_url = base_url.rstrip("/")
+        self.symbols = list(symbols)
+        self.users = [f"loadtest-user-{i}" for i in range(users)]
+        self.mix = mix or DEFAULT_MIX
+        self.max_inflight = max_inflight
+        self._held = {}  # user -> symbols added by portfolio_write
+
+    async def _timed(self, stats: OpStats, send):
+        started = time.perf_counter()
+        try:
+            res = await send()
+            ok = res.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        stats.latencies.append(time.perf_counter() - started)
+        if not ok:
+            stats.errors += 1
+
+    def _request(self, client: httpx.AsyncClient, op: str):
+        user = random.choice(self.users)
+        symbol = random.choice(self.symbols)
+        auth = {"Authorization": f"Bearer {user}"}
+
+        if op == "market_list":
+            return lambda: client.get("/market/list")
+        if op == "market_get":
+            return lambda: client.get(f"/market/{symbol}")
+        if op == "portfolio_poll":
+            return lambda: client.get("/portfolio", params={"user_id": user})
+
+        held = self._held.setdefault(user, set())
+        if symbol in held:
+            held.discard(symbol)
+            return lambda: client.request(
+                "DELETE", "/portfolio/delete",
+                params={"user_id": user}, json={"name": symbol}, headers=auth,
+            )
+        held.add(symbol)
+        return lambda: client.post("/portfolio/add", json={"name": symbol}, headers=auth)
+
+    async def _sample_status(self, client, report: LoadReport, stop: asyncio.Event):
+        while not stop.is_set():
+            try:
+                status = (await client.get("/market/status")).json()
+                report.tick_seconds.append(status["last_tick_seconds"])
+                report.tick_lag.append(status["lag_seconds"])
+                report.tick_speed = status["tick_speed"]
+                report.steps = (report.steps[0] or status["step"], status["step"])
+            except (httpx.HTTPError, ValueError, KeyError):
+                pass
+            try:
+                await asyncio.wait_for(stop.wait(), 0.25)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self, rps: float, duration: float) -> LoadReport:
+        ops = list(self.mix)
+        weights = [self.mix[o] for o in ops]
+        report = LoadReport(duration=duration, target_rps=rps, ops={o: OpStats() for o in ops})
+
+        limits = httpx.Limits(max_connections=self.max_inflight, max_keepalive_connections=self.max_inflight)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=30.0) as client:
+            stop = asyncio.Event()
+            sampler = asyncio.create_task(self._sample_status(client, report, stop))
+            inflight = set()
+
+            start = time.perf_counter()
+            next_at = start
+            while next_at - start < duration:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                next_at += random.expovariate(rps)
+
+                if len(inflight) >= self.max_inflight:
+                    report.shed += 1
+                    continue
+                op = random.choices(ops, weights)[0]
+                task = asyncio.create_task(self._timed(report.ops[op], self._request(client, op)))
+                inflight.add(task)
+                task.add_done_callback(inflight.discard)
+
+            if inflight:
+                await asyncio.wait(inflight)
+            report.duration = time.perf_counter() - start
+            stop.set()
+            await sampler
+
+        return report
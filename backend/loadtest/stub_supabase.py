@@ -0,0 +1,81 @@
+"""
+Local stand-in for the parts of Supabase the backend talks to:
+
+- `GET /auth/v1/user` (used by `app.utils.auth.get_current_user_id`); the
+  bearer token itself is returned as the user id.
+- the PostgREST `cryptoexchange` table under `/rest/v1/` (select, insert and
+  delete with `eq.` filters, as issued by `app.services.portfolio`).
+
+Every request waits `latency_ms` +/- `jitter_ms` first, so the backend can be
+load tested against a realistic round trip without a live project.
+"""
+import asyncio
+import itertools
+import random
+import time
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from app.sim_config import config
+
+
+def _eq_filters(request: Request):
+    filters = {}
+    for key, value in request.query_params.items():
+        if key == "select":
+            continue
+        if value.startswith("eq."):
+            filters[key] = value[3:]
+    return filters
+
+
+def _matches(row: dict, filters: dict):
+    return all(str(row.get(k)) == v for k, v in filters.items())
+
+
+def create_stub_app(latency_ms: float = 20.0, jitter_ms: float = 5.0) -> FastAPI:
+    app = FastAPI()
+    table = config.DB_SCHEMA.CRYPTO_EXCHANGE
+    rows = []
+    ids = itertools.count(1)
+
+    @app.middleware("http")
+    async def add_latency(request: Request, call_next):
+        delay = latency_ms + random.uniform(-jitter_ms, jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+        return await call_next(request)
+
+    @app.get("/auth/v1/user")
+    async def auth_user(request: Request):
+        auth_header = request.headers.get("Authorization") or ""
+        token = auth_header.removeprefix("Bearer ").strip()
+        if not token:
+            raise HTTPException(status_code=401, detail="missing token")
+        return {"id": token, "aud": "authenticated", "role": "authenticated"}
+
+    @app.get(f"/rest/v1/{table}")
+    async def select_rows(request: Request):
+        filters = _eq_filters(request)
+        return [r for r in rows if _matches(r, filters)]
+
+    @app.post(f"/rest/v1/{table}")
+    async def insert_rows(request: Request):
+        payload = await request.json()
+        inserted = []
+        for item in payload if isinstance(payload, list) else [payload]:
+            row = {"id": next(ids), "created_at": time.time(), **item}
+            rows.append(row)
+            inserted.append(row)
+        return JSONResponse(inserted, status_code=201)
+
+    @app.delete(f"/rest/v1/{table}")
+    async def delete_rows(request: Request):
+        filters = _eq_filters(request)
+        deleted = [r for r in rows if _matches(r, filters)]
+        rows[:] = [r for r in rows if not _matches(r, filters)]
+        return deleted
+
+    app.state.rows = rows
+    return app
@@ -0,0 +1,161 @@
+"""AlertEngine against a brute-force scan of the price path."""
+import itertools
+import random
+import time
+
+import pytest
+
+import app.sim_config as cfg
+from app.models.alert import AlertCreate
+from app.models.crypto import Crypto
+from app.services.alerts import alerts_add, alerts_cancel
+from app.services.market import market_add_cryptos, market_delete_crypto
+from app.utils import alerts
+from app.utils import simulator
+from app.utils.alerts import ABOVE, BELOW, CANCELLED, FIRED, RANGE, AlertEngine
+from app.utils.db import cryptos
+
+OWNERS = ["u0", "u1", "u2"]
+_names = itertools.count()
+
+
+@pytest.fixture
+def records():
+    symbols = [f"ALRT{next(_names)}" for _ in range(2)]
+    market_add_cryptos([Crypto(symbol=s, price=100.0, volume=0) for s in symbols])
+    yield [cryptos[s] for s in symbols]
+    for s in symbols:
+        market_delete_crypto(s)
+
+
+@pytest.fixture
+def engine():
+    engine = AlertEngine()
+    yield engine
+    simulator.remove_tick_listener(engine)
+
+
+def _crossed(low, high, price):
+    return (high is not None and price >= high) or (low is not None and price <= low)
+
+
+def _random_alert(rng, price):
+    kind = rng.choice([ABOVE, BELOW, RANGE])
+    if kind == ABOVE:
+        return kind, None, price + rng.randint(-2, 12) * 0.5
+    if kind == BELOW:
+        return kind, price - rng.randint(-2, 12) * 0.5, None
+    low = price - rng.randint(-1, 10) * 0.5
+    return kind, low, low + rng.randint(1, 12) * 0.5
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_alerts_fire_on_first_crossing(seed, records, engine, monkeypatch):
+    # small batches and merges so backlog splitting and compaction run too
+    monkeypatch.setattr(alerts, "_SETTLE_PER_TICK", 5)
+    monkeypatch.setattr(alerts, "_MERGE_MIN", 4)
+    rng = random.Random(seed)
+    path = {r.symbol: [] for r in records}  # (step, price) after each tick
+    added = []  # (alert, record, step added, price at add)
+    cancelled = {}  # id -> step
+
+    for step in range(1, 400):
+        for r in records:
+            r.price = max(1.0, r.price + rng.randint(-3, 3) * 0.5)
+            path[r.symbol].append((step, r.price))
+        engine(step)
+
+        for _ in range(rng.randint(0, 3)):
+            r = rng.choice(records)
+            kind, low, high = _random_alert(rng, r.price)
+            alert = engine.add(r, rng.choice(OWNERS), kind, low=low, high=high)
+            added.append((alert, r, step, r.price))
+        if added and rng.random() < 0.3:
+            alert = rng.choice(added)[0]
+            if engine.cancel(alert.owner, alert.id) is not None:
+                cancelled[alert.id] = step
+
+    fired = {}
+    for owner in OWNERS:
+        for a in engine.poll(owner, 10 ** 6):
+            fired[a["id"]] = a
+
+    for alert, r, step, price in added:
+        if _crossed(alert.low, alert.high, price):
+            assert fired[alert.id]["fired_price"] == price
+            continue
+        expected = next(
+            ((s, p) for s, p in path[r.symbol] if s > step and _crossed(alert.low, alert.high, p)),
+            None,
+        )
+        if alert.id in cancelled:
+            assert alert.status == CANCELLED
+            assert alert.id not in fired
+            assert expected is None or expected[0] > cancelled[alert.id]
+        elif expected is None:
+            assert alert.status != FIRED and alert.id not in fired
+        else:
+            got = fired[alert.id]
+            assert (got["fired_step"], got["fired_price"]) == expected
+
+    # what the indexes still hold is exactly the alerts left active
+    for r in records:
+        idx = engine._symbols.get(r.symbol)
+        active = {a.id for a, rec, _, _ in added if rec is r and a.status not in (FIRED, CANCELLED)}
+        if idx is None:
+            assert not active
+        else:
+            assert idx.live == len(active)
+            held = set(idx.up.alert_ids() + idx.down.alert_ids())
+            assert active <= held
+
+
+def test_fired_ranges_leave_no_entries_behind(records, engine):
+    r = records[0]
+    engine.add(r, "u0", BELOW, low=10.0)  # keeps the symbol indexed
+    for i in range(2 * alerts._MERGE_MIN):
+        engine.add(r, "u0", RANGE, low=50.0 - i * 0.01, high=101.0 + i * 0.01)
+
+    r.price = 200.0
+    engine(1)
+    engine.list("u0")
+
+    idx = engine._symbols[r.symbol]
+    assert idx.live == 1
+    assert len(idx.down.alert_ids()) == 1
+    assert len(engine.poll("u0", 10 ** 6)) == 2 * alerts._MERGE_MIN
+
+
+def test_compaction_does_not_stall_the_tick(records, engine, monkeypatch):
+    monkeypatch.setattr(alerts, "_SETTLE_PER_TICK", 1024)
+    monkeypatch.setattr(cfg, "ALERTS_PER_USER", 10 ** 6)
+    r = records[0]
+    n = 300_000
+    for i in range(n):
+        # 70% sit just above the price, the rest far from it
+        high = 100.5 + (i % 1000) * (0.001 if i % 10 < 7 else 1.0)
+        engine.add(r, f"u{i % 100}", RANGE, low=50.0 - (i % 1000) * 0.01, high=high)
+
+    r.price = 102.0
+    slowest = 0.0
+    for step in range(1, n // 1024 + 10):
+        start = time.perf_counter()
+        engine(step)
+        slowest = max(slowest, time.perf_counter() - start)
+
+    idx = engine._symbols[r.symbol]
+    assert idx.live == 3 * n // 10
+    # compacted at least once along the way
+    assert len(idx.down.alert_ids()) < n
+    # the per-id Python loop this replaced took over 60ms here
+    assert slowest < 0.04
+
+
+def test_one_sided_alerts_drop_the_other_bound(records):
+    symbol = records[0].symbol
+    above = alerts_add("bounds", AlertCreate(symbol=symbol, kind="above", price=150.0, low=50.0))
+    below = alerts_add("bounds", AlertCreate(symbol=symbol, kind="below", price=50.0, high=150.0))
+    assert (above["low"], above["high"]) == (None, 150.0)
+    assert (below["low"], below["high"]) == (50.0, None)
+    alerts_cancel("bounds", above["id"])
+    alerts_cancel("bounds", below["id"])
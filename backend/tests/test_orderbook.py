@@ -0,0 +1,138 @@
+"""LimitOrderBook against a brute-force price-time priority model."""
+import random
+
+import pytest
+
+from app.utils.orderbook import BUY, SELL, CANCELLED, FILLED, LimitOrderBook
+
+PRICES = [99.0 + 0.5 * i for i in range(9)]
+
+
+class Reference:
+    """Every live order in a flat list; matching scans the whole list."""
+
+    def __init__(self):
+        self.live = {}  # id -> [side, price, qty, seq, owner]
+
+    def _best(self, side):
+        orders = [(oid, o) for oid, o in self.live.items() if o[0] == side]
+        if not orders:
+            return None
+        if side == BUY:
+            return min(orders, key=lambda x: (-x[1][1], x[1][3]))
+        return min(orders, key=lambda x: (x[1][1], x[1][3]))
+
+    def _fill(self, oid, qty):
+        o = self.live[oid]
+        o[2] -= qty
+        if o[2] <= 1e-12:
+            del self.live[oid]
+
+    def submit(self, order_id, seq, side, price, qty, owner):
+        opposite = SELL if side == BUY else BUY
+        while qty > 1e-12:
+            best = self._best(opposite)
+            if best is None:
+                break
+            mid, maker = best
+            if (side == BUY and maker[1] > price) or (side == SELL and maker[1] < price):
+                break
+            q = min(maker[2], qty)
+            self._fill(mid, q)
+            qty -= q
+        if qty > 1e-12:
+            self.live[order_id] = [side, price, qty, seq, owner]
+
+    def rest(self, order_id, seq, side, price, qty):
+        self.live[order_id] = [side, price, qty, seq, None]
+
+    def cancel(self, order_id):
+        self.live.pop(order_id, None)
+
+    def match(self):
+        while True:
+            b, a = self._best(BUY), self._best(SELL)
+            if b is None or a is None or b[1][1] < a[1][1]:
+                return
+            q = min(b[1][2], a[1][2])
+            self._fill(b[0], q)
+            self._fill(a[0], q)
+
+
+def _check(book, ref):
+    assert set(book._orders) == set(ref.live)
+    for oid, (side, price, qty, _, owner) in ref.live.items():
+        order = book._orders[oid]
+        assert (order.side, order.price, order.owner) == (side, price, owner)
+        assert order.qty == pytest.approx(qty, abs=1e-9)
+
+    for side, book_side in ((BUY, book.bids), (SELL, book.asks)):
+        levels = {}
+        for s, price, qty, _, _ in ref.live.values():
+            if s == side:
+                levels[price] = levels.get(price, 0.0) + qty
+        assert set(book_side.levels) == set(levels)
+        for price, qty in levels.items():
+            assert book_side.qty[price] == pytest.approx(qty, abs=1e-9)
+        best = (max if side == BUY else min)(levels, default=None)
+        assert book_side.best() == best
+
+    bid, ask = book.best_bid(), book.best_ask()
+    assert bid is None or ask is None or bid < ask
+    assert book.user_orders == sum(o[4] is not None for o in ref.live.values())
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_operations_match_reference(seed):
+    rnd = random.Random(seed)
+    book, ref = LimitOrderBook(), Reference()
+    user_ids = []
+
+    for _ in range(1500):
+        op = rnd.random()
+        if op < 0.55:
+            side = rnd.choice((BUY, SELL))
+            price, qty = rnd.choice(PRICES), rnd.uniform(0.1, 3.0)
+            order = book.submit(side, price, qty, owner=f"u{rnd.randrange(3)}")
+            ref.submit(order.id, order.seq, side, price, qty, order.owner)
+            user_ids.append(order.id)
+        elif op < 0.75 and user_ids:
+            order_id = rnd.choice(user_ids)
+            order = book.cancel(order_id)
+            ref.cancel(order_id)
+            if order is not None:
+                assert order.status == CANCELLED
+        else:
+            mid = rnd.choice(PRICES[2:-2])
+            synthetic = {
+                "bids": [(mid - 0.5 * (i + 1), rnd.uniform(0.1, 2.0)) for i in range(3)],
+                "asks": [(mid + 0.5 * i, rnd.uniform(0.1, 2.0)) for i in range(3)],
+            }
+            for order_id in book._synthetic:
+                ref.cancel(order_id)
+            book.replace_synthetic(synthetic)
+            for order_id in book._synthetic:
+                o = book._orders[order_id]
+                ref.rest(order_id, o.seq, o.side, o.price, o.qty)
+            book.match()
+            ref.match()
+        _check(book, ref)
+
+
+def test_closed_user_orders_stay_queryable():
+    book = LimitOrderBook()
+    maker = book.submit(SELL, 100.0, 1.0, owner="a")
+    taker = book.submit(BUY, 101.0, 1.0, owner="b")
+    assert book.get(maker.id).status == FILLED
+    assert book.get(taker.id).fills == [(100.0, 1.0)]
+    assert book.user_orders == 0
+
+
+def test_replaced_synthetic_quotes_do_not_pile_up_behind_a_user_order():
+    book = LimitOrderBook()
+    book.submit(BUY, 100.0, 1.0, owner="a")
+    for _ in range(10_000):
+        book.replace_synthetic({"bids": [(100.0, 2.0)], "asks": [(101.0, 2.0)]})
+    assert book.bids.count[100.0] == 2
+    assert len(book.bids.levels[100.0]) <= 2 * 2 + 8
+    assert book.level_qty(BUY, 100.0) == 3.0